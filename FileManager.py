@@ -1,35 +1,208 @@
 import json
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from logic import GameLogic, MINE, REVEALED, FLAGGED, QUESTIONED
+from tracing import TRACE, INFO, WARNING, ERROR
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Binary save layout (little endian):
+#   header  magic, version, flags, rows, cols, mines, seed, first click row/col
+#   payload one bit plane per entry in PLANE_BITS, (rows * cols + 7) // 8 bytes
+#           each, zlib-compressed when SAVE_COMPRESSED is set
+SAVE_MAGIC = b"MSWP"
+SAVE_VERSION = 1
+SAVE_HEADER = struct.Struct("<4sBBIIIQii")
+PLANE_BITS = (MINE, REVEALED, FLAGGED, QUESTIONED)
+
+SAVE_GAME_OVER = 1
+SAVE_PAUSED = 2
+SAVE_MINES_PLACED = 4
+SAVE_COMPRESSED = 8
+SAVE_HAS_SEED = 16
+
+def pack_planes(cells):
+    plane_size = (len(cells) + 7) // 8
+    if np is not None:
+        states = np.frombuffer(bytes(cells), dtype=np.uint8)
+        return b"".join(np.packbits((states & bit) != 0, bitorder="little").tobytes() for bit in PLANE_BITS)
+
+    planes = bytearray(plane_size * len(PLANE_BITS))
+    for plane_index, bit in enumerate(PLANE_BITS):
+        offset = plane_index * plane_size
+        for index, state in enumerate(cells):
+            if state & bit:
+                planes[offset + (index >> 3)] |= 1 << (index & 7)
+    return bytes(planes)
+
+def unpack_planes(data, cell_count):
+    plane_size = (cell_count + 7) // 8
+    if len(data) != plane_size * len(PLANE_BITS):
+        raise ValueError("Save payload does not match the board size")
+
+    if np is not None:
+        states = np.zeros(cell_count, dtype=np.uint8)
+        for plane_index, bit in enumerate(PLANE_BITS):
+            plane = np.frombuffer(data, dtype=np.uint8, count=plane_size, offset=plane_index * plane_size)
+            states |= np.unpackbits(plane, count=cell_count, bitorder="little") * np.uint8(bit)
+        return bytearray(states.tobytes())
+
+    cells = bytearray(cell_count)
+    for plane_index, bit in enumerate(PLANE_BITS):
+        offset = plane_index * plane_size
+        for index in range(cell_count):
+            if data[offset + (index >> 3)] >> (index & 7) & 1:
+                cells[index] |= bit
+    return cells
 
 class FileManager:
-    def __init__(self, file_name="game_save.json"):
+    def __init__(self, file_name="game_save.sav", legacy_file_name="game_save.json", compress=True):
         self.file_name = file_name
+        self.legacy_file_name = legacy_file_name
+        self.compress = compress
+        self.pending_save = None
+        self._executor = None
+
+    def snapshot(self, game_logic, game_over, is_paused):
+        """Copy just what a save needs, so the game can keep changing while it is written."""
+        grid = game_logic.grid
+        flags = (SAVE_GAME_OVER if game_over else 0) | (SAVE_PAUSED if is_paused else 0)
+        if game_logic.mines_placed:
+            flags |= SAVE_MINES_PLACED
+        if grid.seed is not None:
+            flags |= SAVE_HAS_SEED
+        first_row, first_col = grid.first_click or (-1, -1)
+        header_fields = (flags, grid.rows, grid.cols, grid.mine_count, grid.seed or 0, first_row, first_col)
+        return header_fields, bytes(grid.cells)
+
+    def encode_snapshot(self, snapshot):
+        (flags, rows, cols, mines, seed, first_row, first_col), cells = snapshot
+        payload = pack_planes(cells)
+        if self.compress:
+            flags |= SAVE_COMPRESSED
+            payload = zlib.compress(payload)
+
+        header = SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, flags, rows, cols, mines, seed, first_row, first_col)
+        return header + payload
+
+    def encode(self, game_logic, game_over, is_paused):
+        return self.encode_snapshot(self.snapshot(game_logic, game_over, is_paused))
+
+    def decode(self, data):
+        magic, version, flags, rows, cols, mines, seed, first_row, first_col = \
+            SAVE_HEADER.unpack_from(data)
+        if magic != SAVE_MAGIC:
+            raise ValueError("Not a Minesweeper save file")
+        if version != SAVE_VERSION:
+            raise ValueError(f"Unsupported save version {version}")
+
+        payload = data[SAVE_HEADER.size:]
+        if flags & SAVE_COMPRESSED:
+            payload = zlib.decompress(payload)
+
+        game_logic = GameLogic(rows, cols, mines, seed=seed if flags & (SAVE_MINES_PLACED | SAVE_HAS_SEED) else None)
+        grid = game_logic.grid
+        grid.cells[:] = unpack_planes(payload, rows * cols)
+        if first_row >= 0:
+            grid.first_click = (first_row, first_col)
+        grid._calculate_neighbors()
+        grid.reset_counters()
+        game_logic.mines_placed = bool(flags & SAVE_MINES_PLACED)
 
-    def save_game(self, grid, rows, cols, mines, game_over, is_paused):
-        game_data = {
-            'grid': [[cell.to_dict() for cell in row] for row in grid],
+        return {
+            'logic': game_logic,
             'mines': mines,
             'rows': rows,
             'cols': cols,
-            'game_over': game_over,
-            'is_paused': is_paused,
+            'game_over': bool(flags & SAVE_GAME_OVER),
+            'is_paused': bool(flags & SAVE_PAUSED),
         }
-        
+
+    def import_legacy(self, game_data):
+        """Build game data from an old JSON save. Those never stored mines, so
+        mines are placed again on the next reveal."""
+        rows, cols = game_data['rows'], game_data['cols']
+        game_logic = GameLogic(rows, cols, game_data['mines'])
+        grid = game_logic.grid
+        for row in game_data['grid']:
+            for cell_data in row:
+                index = cell_data['row'] * cols + cell_data['col']
+                grid.cells[index] = (
+                    (REVEALED if cell_data['is_revealed'] else 0)
+                    | (FLAGGED if cell_data['is_flagged'] else 0)
+                    | (QUESTIONED if cell_data.get('is_questioned') else 0)
+                )
+                grid.counts[index] = cell_data['neighbor_mines']
+        grid.reset_counters()
+
+        return {
+            'logic': game_logic,
+            'mines': game_data['mines'],
+            'rows': rows,
+            'cols': cols,
+            'game_over': game_data['game_over'],
+            'is_paused': game_data['is_paused'],
+        }
+
+    def write_atomic(self, data):
+        """Write to a temp file, fsync it and rename it over the save so a crash never leaves half a file."""
+        temp_name = self.file_name + ".tmp"
+        with open(temp_name, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_name, self.file_name)
+
+    def _write_snapshot(self, snapshot):
+        self.write_atomic(self.encode_snapshot(snapshot))
+        TRACE.emit("io", INFO, "game saved", path=self.file_name)
+
+    def save_game(self, game_logic, game_over, is_paused):
         try:
-            with open(self.file_name, "w") as f:
-                json.dump(game_data, f)
-            print("Game saved!")
+            self._write_snapshot(self.snapshot(game_logic, game_over, is_paused))
         except Exception as e:
-            print(f"Error saving game: {e}")
+            TRACE.emit("io", ERROR, "error saving game", path=self.file_name, error=e)
+
+    def save_game_async(self, game_logic, game_over, is_paused):
+        """Snapshot now and encode/write on a worker thread; returns a Future.
+
+        Saves run one at a time in the order they were requested.
+        """
+        return self.submit(self._write_snapshot, self.snapshot(game_logic, game_over, is_paused))
+
+    def submit(self, work, *args):
+        """Run work(*args) on the save thread, after everything submitted before it."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save")
+        self.pending_save = self._executor.submit(work, *args)
+        return self.pending_save
+
+    def wait_for_save(self):
+        if self.pending_save is not None:
+            self.pending_save.exception()
 
     def load_game(self):
+        # Finish any save still being written so we load what was just saved.
+        self.wait_for_save()
+        file_name = self.file_name
+        if not os.path.exists(file_name) and self.legacy_file_name:
+            file_name = self.legacy_file_name
+
         try:
-            with open(self.file_name, "r") as f:
-                game_data = json.load(f)
-            
-            return game_data
+            with open(file_name, "rb") as f:
+                data = f.read()
+
+            if data.startswith(SAVE_MAGIC):
+                return self.decode(data)
+            return self.import_legacy(json.loads(data))
         except FileNotFoundError:
-            print("No saved game found!")
+            TRACE.emit("io", WARNING, "no saved game found", path=file_name)
             return None
         except Exception as e:
-            print(f"Error loading game: {e}")
-            return None
\ No newline at end of file
+            TRACE.emit("io", ERROR, "error loading game", path=file_name, error=e)
+            return None
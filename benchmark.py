@@ -0,0 +1,211 @@
+"""Time the logic and rendering hot paths and compare runs against a stored baseline.
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --boards 9x9x10 100x100x1600 --skip-draw --json
+    python benchmark.py --compare baseline.json --threshold 0.25
+
+Each case reports the best and median time per call over --repeat samples;
+--compare checks the best times and exits with status 1 when any case got
+slower than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from FileManager import FileManager
+from logic import DIFFICULTY_PRESETS, GameLogic, Grid, REVEALED, np
+
+BOARDS = [(rows, cols, mines) for _, rows, cols, mines in DIFFICULTY_PRESETS] + [
+    (100, 100, 1600),
+    (1000, 1000, 160000),
+]
+
+# Cases without per-sample setup are called repeatedly until a sample takes this long.
+MIN_SAMPLE_SECONDS = 0.01
+
+def board_name(rows, cols, mines):
+    return f"{rows}x{cols}x{mines}"
+
+def parse_board(text):
+    rows, cols, mines = (int(part) for part in text.lower().split("x"))
+    return rows, cols, mines
+
+def measure(run, setup=None, repeat=5):
+    """Seconds per call of run(), one sample per repeat. setup(), if given,
+    runs untimed before every call, e.g. to build a fresh board."""
+    number = 1
+    if setup is None:
+        while True:
+            started = time.perf_counter()
+            for _ in range(number):
+                run()
+            if time.perf_counter() - started >= MIN_SAMPLE_SECONDS:
+                break
+            number *= 2
+
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        samples.append((time.perf_counter() - started) / number)
+    return {"best_ms": min(samples) * 1000, "median_ms": statistics.median(samples) * 1000, "calls": number}
+
+def opened_game(rows, cols, mines, seed=1):
+    """A game with its first click revealed in the middle of the board."""
+    game_logic = GameLogic(rows, cols, mines, seed=seed)
+    game_logic.place_mines(rows // 2, cols // 2)
+    game_logic.reveal_cell(rows // 2, cols // 2)
+    return game_logic
+
+def logic_cases(rows, cols, mines, repeat):
+    state = {}
+
+    def fresh_grid():
+        state["grid"] = Grid(rows, cols, mines, seed=1)
+
+    def placed_grid():
+        fresh_grid()
+        state["grid"].place_mines(rows // 2, cols // 2)
+
+    def empty_grid():
+        # No mines: a single reveal floods the whole board, the worst case.
+        state["grid"] = Grid(rows, cols, 0, seed=1)
+        state["grid"].place_mines(0, 0)
+
+    yield "place_mines", measure(lambda: state["grid"].place_mines(rows // 2, cols // 2), fresh_grid, repeat)
+    placed_grid()
+    yield "calculate_neighbors", measure(state["grid"]._calculate_neighbors, repeat=repeat)
+    yield "reveal_first_click", measure(lambda: state["grid"].reveal_cell(rows // 2, cols // 2), placed_grid, repeat)
+    yield "reveal_flood_worst", measure(lambda: state["grid"].reveal_cell(0, 0), empty_grid, repeat)
+
+    game_logic = opened_game(rows, cols, mines)
+    yield "check_win", measure(game_logic.check_win, repeat=repeat)
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_manager = FileManager(os.path.join(directory, "benchmark.sav"), legacy_file_name=None)
+        yield "save_game", measure(lambda: file_manager.save_game(game_logic, False, False), repeat=repeat)
+        yield "load_game", measure(file_manager.load_game, repeat=repeat)
+
+class HeadlessGame:
+    """The parts of main.Game a GameScene touches, on a dummy-driver window."""
+
+    def __init__(self, pygame):
+        from utils import WIDTH, HEIGHT
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+        self.running = True
+
+    def set_scene(self, name, **kwargs):
+        pass
+
+def draw_cases(rows, cols, mines, repeat, directory):
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    import pygame
+    from journal import MoveJournal
+    from scenes.game_scene import GameScene
+    from utils import TEXT_CACHE, EMOJI_FONT_PATH, STATUS_FONT_SIZE
+
+    pygame.init()
+    if not os.path.exists(EMOJI_FONT_PATH):
+        # The emoji font is not part of every checkout; status text then uses the default font.
+        TEXT_CACHE.fonts[(EMOJI_FONT_PATH, STATUS_FONT_SIZE)] = pygame.font.SysFont(None, STATUS_FONT_SIZE)
+
+    game = HeadlessGame(pygame)
+    scene = GameScene(game, rows=rows, cols=cols, mines=mines,
+                      journal=MoveJournal(os.path.join(directory, "autosave")))
+    scene.handle_left_click(rows // 2, cols // 2)
+    scene.draw(game.screen)
+
+    visible_rows, visible_cols = scene.camera.visible_cells()
+    covered = [(row, col) for row in visible_rows for col in visible_cols
+               if not scene.game_logic.grid.cells[row * cols + col] & REVEALED]
+    # Flag a different covered cell before every sample, so each frame redraws
+    # exactly one cell; marking leaves the banner as it was.
+    to_mark = iter(covered)
+
+    def toggle_mark():
+        cell = next(to_mark, None)
+        if cell:
+            scene.handle_right_click(*cell)
+
+    def draw():
+        scene.draw(game.screen)
+
+    yield "draw_full", measure(draw, scene.invalidate, repeat)
+    yield "draw_mark", measure(draw, toggle_mark, repeat)
+    yield "draw_idle", measure(draw, repeat=repeat)
+    scene.journal.close()
+
+def run(boards, repeat=5, draw=True):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for rows, cols, mines in boards:
+            name = board_name(rows, cols, mines)
+            cases = list(logic_cases(rows, cols, mines, repeat))
+            if draw:
+                cases += draw_cases(rows, cols, mines, repeat, directory)
+            for case, timing in cases:
+                results[f"{case}/{name}"] = timing
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np is not None,
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare(report, baseline, threshold=0.25):
+    """Return (case, baseline_ms, current_ms, ratio) for every case present in
+    both reports, and the subset that is slower than the baseline by more than threshold."""
+    rows = []
+    for case, timing in report["results"].items():
+        before = baseline["results"].get(case)
+        if before is None:
+            continue
+        ratio = timing["best_ms"] / before["best_ms"] if before["best_ms"] else float("inf")
+        rows.append((case, before["best_ms"], timing["best_ms"], ratio))
+    return rows, [row for row in rows if row[3] > 1 + threshold]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boards", nargs="*", type=parse_board, default=BOARDS, metavar="ROWSxCOLSxMINES")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per case")
+    parser.add_argument("--skip-draw", action="store_true", help="leave out GameScene.draw timings")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="print the JSON report instead of a table")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before a case counts as a regression (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    report = run(args.boards, args.repeat, draw=not args.skip_draw)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    elif not args.compare:
+        for case, timing in report["results"].items():
+            print(f"{case:<40} best {timing['best_ms']:10.4f} ms  median {timing['median_ms']:10.4f} ms")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(report, baseline, args.threshold)
+        for case, before, after, ratio in rows:
+            flag = "  REGRESSION" if ratio > 1 + args.threshold else ""
+            print(f"{case:<40} {before:10.4f} -> {after:10.4f} ms  x{ratio:.2f}{flag}")
+        if regressions:
+            print(f"{len(regressions)} of {len(rows)} cases slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
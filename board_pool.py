@@ -0,0 +1,229 @@
+"""No-guess boards: generated in worker processes, checked by playing them out
+with certain moves only, and kept in a small on-disk pool per board size.
+
+    python board_pool.py --difficulty easy hard --count 20
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from logic import DIFFICULTY_PRESETS, GameLogic, REVEALED
+from probability import ProbabilityEngine
+from tracing import TRACE, INFO, WARNING
+
+POOL_DIR = ".cache/boards"
+# Boards kept ready per board size.
+POOL_SIZE = 5
+# Random boards tried per no-guess board before giving up; about one in seven
+# Hard boards passes, so this is only reached for impossibly dense boards.
+MAX_ATTEMPTS = 500
+# How often take_board hands control back to its caller while a board is generated.
+WAIT_SECONDS = 0.05
+
+def solvable_without_guessing(game_logic, row, col):
+    """Play game_logic from a first click at (row, col), revealing only cells that
+    are certainly safe, and return True if that clears the board.
+
+    The Solver's rules come first; when they stall, any cell the exact
+    probabilities put at zero (which also uses the total mine count) is safe.
+    """
+    engine = ProbabilityEngine(game_logic.grid)
+    changes = game_logic.reveal_cell(row, col)
+    engine.observe(changes.cells)
+    while not game_logic.check_win():
+        safe, _ = engine.solver.solve()
+        safe = list(safe)
+        if not safe:
+            probabilities = engine.probabilities()
+            safe = [cell for cell, probability in probabilities.items() if probability == 0.0]
+            if not safe and engine.interior_probability == 0.0:
+                grid = game_logic.grid
+                safe = [divmod(index, grid.cols) for index, state in enumerate(grid.cells)
+                        if not state & REVEALED and divmod(index, grid.cols) not in probabilities]
+            if not safe:
+                return False
+        for cell in safe:
+            changes = game_logic.reveal_cell(*cell)
+            if changes.result == "mine":
+                return False
+            engine.observe(changes.cells)
+    return True
+
+def generate_board(rows, cols, mines, seed=None, max_attempts=MAX_ATTEMPTS):
+    """Return the code of a board that can be cleared without guessing from a
+    first click in the middle, or None if every attempt needed a guess."""
+    rng = random.Random(seed)
+    row, col = rows // 2, cols // 2
+    for _ in range(max_attempts):
+        game_logic = GameLogic(rows, cols, mines, seed=rng.getrandbits(32))
+        game_logic.place_mines(row, col)
+        code = game_logic.board_code()
+        if solvable_without_guessing(game_logic, row, col):
+            return code
+    return None
+
+class BoardPool:
+    """Ready no-guess board codes for one board size, one per line in a text file.
+
+    take() hands out the oldest code; top_up() asks the process pool for
+    enough new boards to bring the file back to size.
+    """
+
+    def __init__(self, rows, cols, mines, size=POOL_SIZE, directory=POOL_DIR):
+        self.rows, self.cols, self.mines = rows, cols, mines
+        self.size = size
+        self.path = os.path.join(directory, f"{rows}x{cols}x{mines}.txt")
+        self.lock = threading.Lock()
+        self.pending = 0
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return [line.strip() for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _write(self, codes):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_name = self.path + ".tmp"
+        with open(temp_name, "w") as f:
+            f.write("".join(code + "\n" for code in codes))
+        os.replace(temp_name, self.path)
+
+    def __len__(self):
+        with self.lock:
+            return len(self._read())
+
+    def take(self):
+        """Remove and return a board code, or None if the pool is empty."""
+        with self.lock:
+            codes = self._read()
+            if not codes:
+                return None
+            self._write(codes[1:])
+            return codes[0]
+
+    def add(self, code):
+        with self.lock:
+            self._write(self._read() + [code])
+
+    def top_up(self, executor):
+        """Start generating the boards the pool is missing; returns their futures."""
+        with self.lock:
+            missing = self.size - len(self._read()) - self.pending
+        futures = []
+        for _ in range(missing):
+            future = executor.submit(generate_board, self.rows, self.cols, self.mines)
+            with self.lock:
+                self.pending += 1
+            future.add_done_callback(self._finished)
+            futures.append(future)
+        return futures
+
+    def _finished(self, future):
+        code = None
+        if future.cancelled():
+            pass
+        elif future.exception() is not None:
+            TRACE.emit("generation", WARNING, "no-guess generation failed", error=future.exception())
+        else:
+            code = future.result()
+            if code is None:
+                TRACE.emit("generation", WARNING, "no no-guess board found", path=self.path)
+        with self.lock:
+            if code is not None:
+                self._write(self._read() + [code])
+            self.pending -= 1
+
+POOLS = {}
+_executor = None
+
+def executor():
+    """The worker processes shared by every pool, started on first use."""
+    global _executor
+    if _executor is None:
+        # Spawned rather than forked: the game process has SDL and other threads running.
+        _executor = ProcessPoolExecutor(max_workers=min(2, os.cpu_count() or 1),
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def top_up(pool):
+    """Top pool up in the background; a broken process pool is replaced next time."""
+    global _executor
+    try:
+        pool.top_up(executor())
+    except BrokenProcessPool as error:
+        TRACE.emit("generation", WARNING, "board generator workers died", error=error)
+        _executor = None
+
+def pool_for(rows, cols, mines):
+    key = (rows, cols, mines)
+    if key not in POOLS:
+        POOLS[key] = BoardPool(rows, cols, mines)
+    return POOLS[key]
+
+def generate_waiting(rows, cols, mines, waiting=None):
+    """Generate one board in a worker process. waiting(), if given, is called
+    every WAIT_SECONDS until the board is ready, e.g. to keep a window
+    responsive; returning False gives up. Returns None without a board."""
+    global _executor
+    try:
+        future = executor().submit(generate_board, rows, cols, mines)
+        while True:
+            try:
+                return future.result(timeout=WAIT_SECONDS)
+            except TimeoutError:
+                if waiting is not None and not waiting():
+                    future.cancel()
+                    return None
+    except BrokenProcessPool as error:
+        TRACE.emit("generation", WARNING, "board generator workers died", error=error)
+        _executor = None
+        return None
+
+def take_board(rows, cols, mines, waiting=None):
+    """Code of a no-guess board, from the pool when one is ready and generated
+    in a worker process otherwise (see generate_waiting); either way the pool is
+    topped up in the background. Returns None if no no-guess board could be had."""
+    pool = pool_for(rows, cols, mines)
+    code = pool.take()
+    if code is None:
+        started = time.perf_counter()
+        code = generate_waiting(rows, cols, mines, waiting)
+        TRACE.emit("generation", INFO, "pool empty, generated while waiting", board=f"{rows}x{cols}x{mines}",
+                   found=code is not None, ms=round((time.perf_counter() - started) * 1000, 1))
+    top_up(pool)
+    return code
+
+def top_up_presets():
+    for _, rows, cols, mines in DIFFICULTY_PRESETS:
+        top_up(pool_for(rows, cols, mines))
+
+def shutdown():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+def main(argv=None):
+    presets = {name.lower(): (rows, cols, mines) for name, rows, cols, mines in DIFFICULTY_PRESETS}
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--difficulty", nargs="*", choices=sorted(presets), default=sorted(presets))
+    parser.add_argument("--count", type=int, default=POOL_SIZE, help="boards to keep per difficulty")
+    args = parser.parse_args(argv)
+
+    for name in args.difficulty:
+        pool = BoardPool(*presets[name], size=args.count)
+        started = time.perf_counter()
+        futures = pool.top_up(executor())
+        # Boards are added by done-callbacks, which may run after result() returns.
+        while pool.pending:
+            time.sleep(0.01)
+        print(f"{name}: {len(pool)} boards in {pool.path}, {len(futures)} generated "
+              f"in {time.perf_counter() - started:.2f}s")
+    shutdown()
+
+if __name__ == "__main__":
+    main()
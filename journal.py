@@ -0,0 +1,125 @@
+import os
+import random
+import struct
+from FileManager import FileManager
+from tracing import TRACE, INFO, WARNING, ERROR
+
+RECORD = struct.Struct("<BII")
+ACTION_CODES = {"reveal": 1, "mark": 2, "chord": 3}
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+
+class MoveJournal:
+    """Crash-safe autosave: a full snapshot plus an append-only log of later moves.
+
+    Every move costs one fixed-size record. After snapshot_every moves a new
+    snapshot is written and the log is truncated; restore() loads the snapshot
+    and replays whatever the log holds.
+
+    Snapshots and records are written in order on the file manager's save
+    thread, so the log is only truncated once the snapshot that replaces it is
+    on disk and the event loop never waits for the encode or the fsync.
+    """
+
+    def __init__(self, path="autosave", snapshot_every=200):
+        self.snapshot_path = path + ".sav"
+        self.journal_path = path + ".journal"
+        self.snapshot_every = snapshot_every
+        self.file_manager = FileManager(self.snapshot_path, legacy_file_name=None)
+        self.moves_since_snapshot = 0
+        self._file = None
+
+    def exists(self):
+        return os.path.exists(self.snapshot_path)
+
+    def start(self, game_logic):
+        """Begin journaling game_logic from a fresh snapshot of its current state."""
+        if game_logic.grid.seed is None:
+            # Fix the seed now so replaying the first reveal places the same mines.
+            game_logic.grid.seed = random.getrandbits(32)
+        game_logic.journal = self
+        self.snapshot(game_logic)
+
+    def snapshot(self, game_logic):
+        self.file_manager.submit(self._write_snapshot, self.file_manager.snapshot(game_logic, False, False))
+        self.moves_since_snapshot = 0
+
+    def _write_snapshot(self, snapshot):
+        try:
+            self.file_manager.write_atomic(self.file_manager.encode_snapshot(snapshot))
+        except Exception as e:
+            # Keep appending to the old log, which still matches the old snapshot.
+            TRACE.emit("io", ERROR, "error writing autosave snapshot", path=self.snapshot_path, error=e)
+            return
+        self._close_file()
+        self._file = open(self.journal_path, "wb")
+        TRACE.emit("io", INFO, "autosave snapshot", path=self.snapshot_path)
+
+    def record(self, game_logic, action, row, col):
+        self.file_manager.submit(self._append, RECORD.pack(ACTION_CODES[action], row, col))
+        self.moves_since_snapshot += 1
+        if self.moves_since_snapshot >= self.snapshot_every:
+            self.snapshot(game_logic)
+
+    def _append(self, record):
+        if self._file is None:
+            return
+        try:
+            self._file.write(record)
+            self._file.flush()
+        except OSError as e:
+            TRACE.emit("io", ERROR, "error writing autosave journal", path=self.journal_path, error=e)
+
+    def restore(self):
+        """Return game data like FileManager.load_game, with the logged moves replayed,
+        or None if there is nothing to restore. Journaling continues afterwards."""
+        game_data = self.file_manager.load_game()
+        if game_data is None:
+            return None
+
+        try:
+            with open(self.journal_path, "rb") as f:
+                log = f.read()
+        except FileNotFoundError:
+            log = b""
+
+        game_logic = game_data['logic']
+        moves = {"reveal": game_logic.reveal_cell, "mark": game_logic.toggle_mark, "chord": game_logic.chord}
+        game_over = False
+        # A torn final record from a crash mid-write is ignored.
+        complete = len(log) - len(log) % RECORD.size
+        for offset in range(0, complete, RECORD.size):
+            code, row, col = RECORD.unpack_from(log, offset)
+            if code not in ACTION_NAMES:
+                TRACE.emit("io", WARNING, "unknown journal record", code=code, offset=offset)
+                break
+            if moves[ACTION_NAMES[code]](row, col).result == "mine":
+                game_over = True
+        game_data['game_over'] = game_over or game_logic.check_win()
+
+        self.close()
+        with open(self.journal_path, "ab") as f:
+            f.truncate(complete)
+        self._file = open(self.journal_path, "ab")
+        self.moves_since_snapshot = complete // RECORD.size
+        game_logic.journal = self
+        TRACE.emit("io", INFO, "autosave restored", moves=self.moves_since_snapshot)
+        return game_data
+
+    def close(self):
+        """Finish every queued write, then close the log."""
+        self.file_manager.wait_for_save()
+        self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Drop the autosave, e.g. once the game has been won or lost."""
+        self.close()
+        for path in (self.snapshot_path, self.journal_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -1,4 +1,135 @@
 import random
+import sys
+from collections import deque
+from tracing import TRACE, DEBUG, INFO
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Name, rows, cols, mines for the presets offered by the difficulty menu.
+DIFFICULTY_PRESETS = [
+    ("Easy", 9, 9, 10),
+    ("Medium", 16, 16, 40),
+    ("Hard", 30, 16, 99),
+]
+
+# Seeds are kept to 32 bits so board codes stay short hex and saves fit them.
+SEED_MASK = 0xFFFFFFFF
+
+def normalize_seed(seed):
+    """Any int seed, negative or huge, as the 32-bit seed it is stored as."""
+    return None if seed is None else seed & SEED_MASK
+
+MINE = 1
+REVEALED = 2
+FLAGGED = 4
+QUESTIONED = 8
+
+_STATE_BITS = {
+    'is_mine': MINE,
+    'is_revealed': REVEALED,
+    'is_flagged': FLAGGED,
+    'is_questioned': QUESTIONED,
+}
+
+class CellView:
+    """Dict-style view of one packed cell so grid.grid[r][c]['key'] keeps working."""
+    __slots__ = ('_grid', '_index')
+
+    def __init__(self, grid, index):
+        self._grid = grid
+        self._index = index
+
+    def __getitem__(self, key):
+        if key == 'neighbor_mines':
+            return self._grid.counts[self._index]
+        return bool(self._grid.cells[self._index] & _STATE_BITS[key])
+
+    def __setitem__(self, key, value):
+        grid = self._grid
+        if key == 'neighbor_mines':
+            grid.counts[self._index] = value
+            return
+        if key == 'is_flagged':
+            grid.set_flag(*divmod(self._index, grid.cols), value)
+            return
+        bit = _STATE_BITS[key]
+        if value:
+            grid.cells[self._index] |= bit
+        else:
+            grid.cells[self._index] &= ~bit & 0xFF
+        grid.reset_counters()
+
+    def __contains__(self, key):
+        return key == 'neighbor_mines' or key in _STATE_BITS
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        return self[key]
+
+    def keys(self):
+        return list(_STATE_BITS) + ['neighbor_mines']
+
+class RowView:
+    __slots__ = ('_grid', '_row')
+
+    def __init__(self, grid, row):
+        self._grid = grid
+        self._row = row
+
+    def __len__(self):
+        return self._grid.cols
+
+    def __getitem__(self, col):
+        if col < 0:
+            col += self._grid.cols
+        if not 0 <= col < self._grid.cols:
+            raise IndexError("column index out of range")
+        return CellView(self._grid, self._row * self._grid.cols + col)
+
+    def __iter__(self):
+        for col in range(self._grid.cols):
+            yield self[col]
+
+class GridView:
+    """Row-major list-of-lists facade over the packed Grid storage."""
+    __slots__ = ('_grid',)
+
+    def __init__(self, grid):
+        self._grid = grid
+
+    def __len__(self):
+        return self._grid.rows
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self._grid.rows
+        if not 0 <= row < self._grid.rows:
+            raise IndexError("row index out of range")
+        return RowView(self._grid, row)
+
+    def __iter__(self):
+        for row in range(self._grid.rows):
+            yield self[row]
+
+class ChangeSet:
+    """Outcome of one move plus the new state of every cell it touched."""
+
+    def __init__(self, result, triggered=None):
+        self.result = result
+        self.triggered = triggered
+        self.cells = {}
+
+    def add(self, grid, positions):
+        for row, col in positions:
+            self.cells[(row, col)] = grid.cell_state(row, col)
+        return self
+
+    def __len__(self):
+        return len(self.cells)
 
 class GameComponent:
     def __init__(self):
@@ -8,143 +139,609 @@ class GameComponent:
         return none
 
 class Grid(GameComponent):
-    def __init__(self, rows, cols, mine_count):
+    # When True, every reveal and flag change re-checks the counters against a full scan.
+    debug_counters = False
+
+    def __init__(self, rows, cols, mine_count, seed=None):
         super().__init__()
         self.rows = rows
         self.cols = cols
         self.mine_count = mine_count
-        self.grid = [[{
-            'is_mine': False,
-            'is_revealed': False,
-            'is_flagged': False,
-            'neighbor_mines': 0
-        } for _ in range(cols)] for _ in range(rows)]
-
-    def place_mines(self, safe_row, safe_col):
-        positions = set()
-        excluded = set()
-
-        print(f"Placing mines around safe cell: ({safe_row}, {safe_col})")
-
-        for delta_row in (-1, 0, 1):
-            for delta_col in (-1, 0, 1):
-                row, col = safe_row + delta_row, safe_col + delta_col
-                if 0 <= row < self.rows and 0 <= col < self.cols:
-                    excluded.add((row, col))
-
-        print(f"Excluded cells: {excluded}")
-
-        while len(positions) < self.mine_count:
-            row = random.randint(0, self.rows - 1)
-            col = random.randint(0, self.cols - 1)
-            if (row, col) not in excluded and not self.grid[row][col]['is_mine']:
-                positions.add((row, col))
-
-        print(f"Mine positions: {positions}")
-
-        for row, col in positions:
-            self.grid[row][col]['is_mine'] = True
+        self.seed = normalize_seed(seed)
+        self.first_click = None
+        self.mine_indices = []
+        # One byte of state bits and one byte of neighbor count per cell,
+        # indexed by row * cols + col.
+        self.cells = bytearray(rows * cols)
+        self.counts = bytearray(rows * cols)
+        self.grid = GridView(self)
+        # Cells uncovered by the most recent reveal_cell call.
+        self.last_revealed = []
+        self.reset_counters()
+
+    def _index(self, row, col):
+        return row * self.cols + col
+
+    def neighbors(self, row, col):
+        for neighbor_row in range(max(0, row - 1), min(self.rows, row + 2)):
+            for neighbor_col in range(max(0, col - 1), min(self.cols, col + 2)):
+                if neighbor_row != row or neighbor_col != col:
+                    yield neighbor_row, neighbor_col
+
+    def cell_state(self, row, col):
+        index = self._index(row, col)
+        state = self.cells[index]
+        return {
+            'is_revealed': bool(state & REVEALED),
+            'is_flagged': bool(state & FLAGGED),
+            'is_questioned': bool(state & QUESTIONED),
+            'neighbor_mines': self.counts[index],
+        }
+
+    def mine_positions(self):
+        return [divmod(index, self.cols) for index in self.mine_indices]
+
+    def flagged_positions(self):
+        return [divmod(index, self.cols) for index in self.flagged]
+
+    @property
+    def flags_placed(self):
+        return len(self.flagged)
+
+    @property
+    def mines_remaining(self):
+        return self.mine_count - self.flags_placed
+
+    def _scan_counters(self):
+        revealed_safe = 0
+        flagged = set()
+        mines = []
+        for index, state in enumerate(self.cells):
+            if state & MINE:
+                mines.append(index)
+            elif state & REVEALED:
+                revealed_safe += 1
+            if state & FLAGGED:
+                flagged.add(index)
+        return self.rows * self.cols - self.mine_count - revealed_safe, flagged, mines
+
+    def reset_counters(self):
+        """Rebuild the running counters from a full scan of the board."""
+        self.unrevealed_safe, self.flagged, self.mine_indices = self._scan_counters()
+
+    def verify_counters(self):
+        unrevealed_safe, flagged, mines = self._scan_counters()
+        assert self.unrevealed_safe == unrevealed_safe, \
+            f"unrevealed_safe is {self.unrevealed_safe}, scan found {unrevealed_safe}"
+        assert self.flagged == flagged, \
+            f"{self.flags_placed} flags tracked, scan found {len(flagged)}"
+        if self.first_click is not None:
+            assert len(mines) == self.mine_count, f"board holds {len(mines)} mines, expected {self.mine_count}"
+
+    def set_flag(self, row, col, flagged):
+        index = self._index(row, col)
+        state = self.cells[index]
+        if bool(state & FLAGGED) == bool(flagged):
+            return
+        if flagged:
+            self.cells[index] = state | FLAGGED
+            self.flagged.add(index)
+        else:
+            self.cells[index] = state & ~FLAGGED & 0xFF
+            self.flagged.discard(index)
+
+        if self.debug_counters:
+            self.verify_counters()
+
+    def set_question(self, row, col, questioned):
+        index = self._index(row, col)
+        if questioned:
+            self.cells[index] |= QUESTIONED
+        else:
+            self.cells[index] &= ~QUESTIONED & 0xFF
+
+    def place_mines(self, safe_row, safe_col, rng=None):
+        """Place mine_count mines outside the 3x3 block around the first click.
+
+        rng may be an int seed or a random.Random; either way the seed actually
+        used is kept in self.seed so the board can be rebuilt from board_code().
+        """
+        excluded = sorted(
+            self._index(row, col)
+            for row in range(max(0, safe_row - 1), min(self.rows, safe_row + 2))
+            for col in range(max(0, safe_col - 1), min(self.cols, safe_col + 2))
+        )
+        available = self.rows * self.cols - len(excluded)
+        if not 0 <= self.mine_count <= available:
+            raise ValueError(
+                f"Cannot place {self.mine_count} mines on a {self.rows}x{self.cols} board "
+                f"with {available} cells outside the safe zone"
+            )
+
+        if isinstance(rng, random.Random):
+            seed = rng.getrandbits(32)
+        elif rng is not None:
+            seed = rng
+        elif self.seed is not None:
+            seed = self.seed
+        else:
+            seed = random.getrandbits(32)
+        self.seed = seed = normalize_seed(seed)
+        self.first_click = (safe_row, safe_col)
+
+        if TRACE.wants("generation", INFO):
+            TRACE.emit("generation", INFO, "placing mines", safe_row=safe_row, safe_col=safe_col,
+                       mines=self.mine_count, seed=seed)
+
+        # Sample ranks among the allowed cells, then shift each rank past the
+        # excluded indices that precede it.
+        for position in random.Random(seed).sample(range(available), self.mine_count):
+            for skipped in excluded:
+                if skipped > position:
+                    break
+                position += 1
+            self.cells[position] |= MINE
+            self.mine_indices.append(position)
 
         self._calculate_neighbors()
 
+    def board_code(self):
+        """Return a short code such as '9x9x10-1f3a9c2e-4,4' that rebuilds this board."""
+        if self.first_click is None:
+            raise ValueError("Mines have not been placed yet")
+        row, col = self.first_click
+        return f"{self.rows}x{self.cols}x{self.mine_count}-{self.seed:x}-{row},{col}"
+
+    @classmethod
+    def from_board_code(cls, code):
+        try:
+            size, seed, click = code.strip().split("-")
+            rows, cols, mine_count = (int(part) for part in size.split("x"))
+            row, col = (int(part) for part in click.split(","))
+            seed = int(seed, 16)
+        except ValueError:
+            raise ValueError(f"Invalid board code: {code!r}") from None
+
+        grid = cls(rows, cols, mine_count, seed=seed)
+        grid.place_mines(row, col)
+        return grid
+
     def _calculate_neighbors(self):
+        if np is not None:
+            self._calculate_neighbors_numpy()
+        else:
+            self._calculate_neighbors_python()
+
+    def _calculate_neighbors_numpy(self):
+        mines = np.frombuffer(self.cells, dtype=np.uint8).reshape(self.rows, self.cols) & MINE
+        padded = np.pad(mines, 1)
+        # Shifted sum of the 3x3 window around every cell; mines keep a count of 0.
+        total = np.zeros_like(mines)
+        for delta_row in range(3):
+            for delta_col in range(3):
+                total += padded[delta_row:delta_row + self.rows, delta_col:delta_col + self.cols]
+        total[mines == MINE] = 0
+        self.counts[:] = total.tobytes()
+
+    def _calculate_neighbors_python(self):
+        cells, counts = self.cells, self.counts
         for row in range(self.rows):
             for col in range(self.cols):
-                if self.grid[row][col]['is_mine']:
+                index = self._index(row, col)
+                if cells[index] & MINE:
+                    counts[index] = 0
                     continue
-                self.grid[row][col]['neighbor_mines'] = self._count_neighbors(row, col)
+                counts[index] = self._count_neighbors(row, col)
 
     def _count_neighbors(self, row, col):
+        cells, cols = self.cells, self.cols
         count = 0
         for r in range(max(0, row-1), min(self.rows, row+2)):
-            for c in range(max(0, col-1), min(self.cols, col+2)):
-                if self.grid[r][c]['is_mine']:
-                    count += 1
+            start = r * cols
+            for c in range(max(0, col-1), min(cols, col+2)):
+                count += cells[start + c] & MINE
         return count
 
     def reveal_cell(self, row, col):
-        print(f"Revealing cell at ({row}, {col})")
+        self.last_revealed = []
         if not (0 <= row < self.rows and 0 <= col < self.cols):
             return "out_of_bounds"
 
-        cell = self.grid[row][col]
+        index = self._index(row, col)
+        state = self.cells[index]
 
-        if cell['is_revealed']:
+        if state & REVEALED:
             return "already_revealed"
-        
-        cell['is_revealed'] = True
 
-        if cell['is_mine']:
+        self.cells[index] = state | REVEALED
+        self.last_revealed.append((row, col))
+
+        if state & MINE:
             return "mine"
 
-        if cell['neighbor_mines'] == 0:
-            self._flood_fill(row, col)
+        if self.counts[index] == 0:
+            self.last_revealed.extend(self._flood_fill(row, col))
+        self.unrevealed_safe -= len(self.last_revealed)
+
+        if self.debug_counters:
+            self.verify_counters()
+
+        if TRACE.wants("reveal", DEBUG):
+            TRACE.emit("reveal", DEBUG, "revealed", row=row, col=col, cells=len(self.last_revealed))
 
         return "safe"
 
     def _flood_fill(self, row, col):
-        for delta_row in (-1, 0, 1):
-            for delta_col in (-1, 0, 1):
-                if delta_row == 0 and delta_col == 0:
-                    continue
+        """Reveal the empty region around (row, col) breadth-first and return the cells uncovered."""
+        cells, counts = self.cells, self.counts
+        rows, cols = self.rows, self.cols
+        revealed = []
+        queue = deque([(row, col)])
 
-                neighbor_row, neighbor_col = row + delta_row, col + delta_col
+        while queue:
+            row, col = queue.popleft()
+            for neighbor_row in range(max(0, row - 1), min(rows, row + 2)):
+                start = neighbor_row * cols
+                for neighbor_col in range(max(0, col - 1), min(cols, col + 2)):
+                    index = start + neighbor_col
+                    if cells[index] & (REVEALED | MINE):
+                        continue
 
-                if 0 <= neighbor_row < self.rows and 0 <= neighbor_col < self.cols:
-                    neighbor = self.grid[neighbor_row][neighbor_col]
+                    cells[index] |= REVEALED
+                    revealed.append((neighbor_row, neighbor_col))
 
-                    if not neighbor['is_revealed'] and not neighbor['is_mine']:
-                        neighbor['is_revealed'] = True
+                    if counts[index] == 0:
+                        queue.append((neighbor_row, neighbor_col))
 
-                        if neighbor['neighbor_mines'] == 0:
-                            self._flood_fill(neighbor_row, neighbor_col)
+        return revealed
 
-    def place_mines_around_safe_cell(self, safe_row, safe_col):
-        print(f"Placing mines around safe cell: ({safe_row}, {safe_col})")
-        positions = set()
-        excluded = set()
+    def check_win(self):
+        return self.unrevealed_safe == 0
 
-        for delta_row in (-1, 0, 1):
-            for delta_col in (-1, 0, 1):
-                row, col = safe_row + delta_row, safe_col + delta_col
-                if 0 <= row < self.rows and 0 <= col < self.cols:
-                    excluded.add((row, col))
+class Tile:
+    """One block of a ChunkedGrid: packed state bits and, once needed, neighbor counts."""
+    __slots__ = ('row', 'col', 'height', 'width', 'cells', 'counts')
 
-        while len(positions) < self.mine_count:
-            row = random.randint(0, self.rows - 1)
-            col = random.randint(0, self.cols - 1)
-            if (row, col) not in excluded and not self.grid[row][col]['is_mine']:
-                positions.add((row, col))
+    def __init__(self, row, col, height, width):
+        self.row = row
+        self.col = col
+        self.height = height
+        self.width = width
+        self.cells = bytearray(height * width)
+        self.counts = None
 
-        for row, col in positions:
-            self.grid[row][col]['is_mine'] = True
+    def memory_usage(self):
+        return sys.getsizeof(self.cells) + (sys.getsizeof(self.counts) if self.counts is not None else 0)
+
+class TiledCells:
+    """grid.cells / grid.counts for a ChunkedGrid: flat row * cols + col indexing
+    that creates the tile holding a cell on first access."""
+    __slots__ = ('_grid', '_counts')
+
+    def __init__(self, grid, counts=False):
+        self._grid = grid
+        self._counts = counts
+
+    def _locate(self, index):
+        tile, local = self._grid._locate(*divmod(index, self._grid.cols))
+        return (self._grid._tile_counts(tile) if self._counts else tile.cells), local
 
+    def __getitem__(self, index):
+        values, local = self._locate(index)
+        return values[local]
+
+    def __setitem__(self, index, value):
+        values, local = self._locate(index)
+        values[local] = value
+
+    def __len__(self):
+        return self._grid.rows * self._grid.cols
+
+    def __iter__(self):
+        raise TypeError("Iterating a ChunkedGrid would create every tile; use grid.tiles instead")
+
+class ChunkedGrid(Grid):
+    """Grid for very large boards, stored as tile_size x tile_size tiles.
+
+    Tiles are created on first access and get their mines from the board seed
+    and their own position, so untouched regions take no memory and a board
+    plays the same whatever order its tiles are visited in. Each tile holds a
+    fixed share of mine_count in proportion to its cells outside the safe zone.
+    Neighbor counts of a tile are computed when first read.
+
+    Only materialized tiles are scanned by reset_counters(), mine_positions()
+    and friends; cells of a tile that was never touched are all unrevealed.
+    """
+
+    def __init__(self, rows, cols, mine_count, seed=None, tile_size=64):
+        GameComponent.__init__(self)
+        self.rows = rows
+        self.cols = cols
+        self.mine_count = mine_count
+        self.seed = normalize_seed(seed)
+        self.tile_size = tile_size
+        self.first_click = None
+        self.excluded = []
+        self.mine_indices = []
+        self.tiles = {}
+        self.cells = TiledCells(self)
+        self.counts = TiledCells(self, counts=True)
+        self.grid = GridView(self)
+        self.last_revealed = []
+        self.reset_counters()
+
+    def _locate(self, row, col):
+        """Return the tile holding (row, col) and the cell's index inside it."""
+        tile_row, local_row = divmod(row, self.tile_size)
+        tile_col, local_col = divmod(col, self.tile_size)
+        tile = self.tiles.get((tile_row, tile_col))
+        if tile is None:
+            tile = self._create_tile(tile_row, tile_col)
+        return tile, local_row * tile.width + local_col
+
+    def _create_tile(self, tile_row, tile_col):
+        size = self.tile_size
+        tile = Tile(tile_row, tile_col,
+                    min(size, self.rows - tile_row * size), min(size, self.cols - tile_col * size))
+        self.tiles[(tile_row, tile_col)] = tile
+        if self.first_click is not None:
+            self._place_tile_mines(tile)
+        if TRACE.wants("generation", DEBUG):
+            TRACE.emit("generation", DEBUG, "tile created", tile=(tile_row, tile_col),
+                       tiles=len(self.tiles), bytes=tile.memory_usage())
+        return tile
+
+    def _tile_excluded(self, tile):
+        """Indices inside the tile of the safe-zone cells it contains, sorted."""
+        size = self.tile_size
+        top, left = tile.row * size, tile.col * size
+        return sorted((row - top) * tile.width + col - left for row, col in self.excluded
+                      if top <= row < top + tile.height and left <= col < left + tile.width)
+
+    def _tile_mine_count(self, tile, excluded):
+        """This tile's share of mine_count: a difference of floors over the
+        allowed cells of all earlier tiles (row-major), so the shares add up exactly."""
+        size = self.tile_size
+        available = self.rows * self.cols - len(self.excluded)
+        if not available:
+            return 0
+        before = tile.row * size * self.cols + tile.height * tile.col * size
+        before -= sum(1 for row, col in self.excluded if (row // size, col // size) < (tile.row, tile.col))
+        after = before + tile.height * tile.width - len(excluded)
+        return self.mine_count * after // available - self.mine_count * before // available
+
+    def _place_tile_mines(self, tile):
+        excluded = self._tile_excluded(tile)
+        count = self._tile_mine_count(tile, excluded)
+        size = self.tile_size
+        rng = random.Random(f"{self.seed}:{tile.row}:{tile.col}")
+        for position in rng.sample(range(tile.height * tile.width - len(excluded)), count):
+            for skipped in excluded:
+                if skipped > position:
+                    break
+                position += 1
+            tile.cells[position] |= MINE
+            local_row, local_col = divmod(position, tile.width)
+            self.mine_indices.append((tile.row * size + local_row) * self.cols + tile.col * size + local_col)
+
+    def _tile_counts(self, tile):
+        """Neighbor counts of a tile, computed on first use from its mines and
+        the edges of the eight tiles around it."""
+        if tile.counts is not None:
+            return tile.counts
+        size = self.tile_size
+        top, left = tile.row * size, tile.col * size
+        height, width = tile.height, tile.width
+        # Mines of the tile plus a one-cell border, padded with zeros off the board.
+        padded_width = width + 2
+        mines = bytearray((height + 2) * padded_width)
+        for padded_row in range(height + 2):
+            row = top + padded_row - 1
+            if not 0 <= row < self.rows:
+                continue
+            for padded_col in range(padded_width):
+                col = left + padded_col - 1
+                if not 0 <= col < self.cols:
+                    continue
+                if 0 < padded_row <= height and 0 < padded_col <= width:
+                    state = tile.cells[(padded_row - 1) * width + padded_col - 1]
+                else:
+                    neighbor, local = self._locate(row, col)
+                    state = neighbor.cells[local]
+                mines[padded_row * padded_width + padded_col] = state & MINE
+
+        counts = bytearray(height * width)
+        for row in range(height):
+            above, middle, below = (mines[(row + offset) * padded_width:(row + offset + 1) * padded_width]
+                                    for offset in range(3))
+            for col in range(width):
+                if middle[col + 1]:
+                    continue
+                counts[row * width + col] = sum(above[col:col + 3]) + sum(middle[col:col + 3]) + sum(below[col:col + 3])
+        tile.counts = counts
+        return counts
+
+    def memory_usage(self):
+        """Bytes held by each created tile, keyed by (tile_row, tile_col)."""
+        return {key: tile.memory_usage() for key, tile in self.tiles.items()}
+
+    def _scan_counters(self):
+        revealed_safe = 0
+        flagged = set()
+        mines = []
+        size, cols = self.tile_size, self.cols
+        for tile in self.tiles.values():
+            top, left = tile.row * size, tile.col * size
+            for local, state in enumerate(tile.cells):
+                local_row, local_col = divmod(local, tile.width)
+                index = (top + local_row) * cols + left + local_col
+                if state & MINE:
+                    mines.append(index)
+                elif state & REVEALED:
+                    revealed_safe += 1
+                if state & FLAGGED:
+                    flagged.add(index)
+        return self.rows * self.cols - self.mine_count - revealed_safe, flagged, mines
+
+    def verify_counters(self):
+        unrevealed_safe, flagged, _ = self._scan_counters()
+        assert self.unrevealed_safe == unrevealed_safe, \
+            f"unrevealed_safe is {self.unrevealed_safe}, scan found {unrevealed_safe}"
+        assert self.flagged == flagged, \
+            f"{self.flags_placed} flags tracked, scan found {len(flagged)}"
+
+    def place_mines(self, safe_row, safe_col, rng=None):
+        """Fix the seed and safe zone; mines appear tile by tile as tiles are created."""
+        self.excluded = [
+            (row, col)
+            for row in range(max(0, safe_row - 1), min(self.rows, safe_row + 2))
+            for col in range(max(0, safe_col - 1), min(self.cols, safe_col + 2))
+        ]
+        available = self.rows * self.cols - len(self.excluded)
+        if not 0 <= self.mine_count <= available:
+            raise ValueError(
+                f"Cannot place {self.mine_count} mines on a {self.rows}x{self.cols} board "
+                f"with {available} cells outside the safe zone"
+            )
+
+        if isinstance(rng, random.Random):
+            seed = rng.getrandbits(32)
+        elif rng is not None:
+            seed = rng
+        elif self.seed is not None:
+            seed = self.seed
+        else:
+            seed = random.getrandbits(32)
+        self.seed = seed = normalize_seed(seed)
+        self.first_click = (safe_row, safe_col)
+
+        if TRACE.wants("generation", INFO):
+            TRACE.emit("generation", INFO, "placing mines per tile", safe_row=safe_row, safe_col=safe_col,
+                       mines=self.mine_count, seed=seed, tile_size=self.tile_size)
+
+        # Tiles touched before the first click (e.g. by a flag) get their mines now.
+        for tile in self.tiles.values():
+            self._place_tile_mines(tile)
         self._calculate_neighbors()
 
-    def check_win(self):
-        for row in self.grid:
-            for cell in row:
-                if not cell['is_mine'] and not cell['is_revealed']:
-                    return False
-        return True
+    def _calculate_neighbors(self):
+        # Counts are rebuilt lazily, tile by tile.
+        for tile in self.tiles.values():
+            tile.counts = None
+
+    def _flood_fill(self, row, col):
+        """Reveal the empty region around (row, col) breadth-first, across tiles."""
+        rows, cols = self.rows, self.cols
+        locate, tile_counts = self._locate, self._tile_counts
+        revealed = []
+        queue = deque([(row, col)])
+
+        while queue:
+            row, col = queue.popleft()
+            for neighbor_row in range(max(0, row - 1), min(rows, row + 2)):
+                for neighbor_col in range(max(0, col - 1), min(cols, col + 2)):
+                    tile, local = locate(neighbor_row, neighbor_col)
+                    state = tile.cells[local]
+                    if state & (REVEALED | MINE):
+                        continue
+
+                    tile.cells[local] = state | REVEALED
+                    revealed.append((neighbor_row, neighbor_col))
+
+                    if tile_counts(tile)[local] == 0:
+                        queue.append((neighbor_row, neighbor_col))
+
+        return revealed
 
 class GameLogic:
-    def __init__(self, rows, cols, mine_count):
-        self.grid = Grid(rows, cols, mine_count)
+    def __init__(self, rows, cols, mine_count, seed=None, tile_size=None):
+        # tile_size switches to a ChunkedGrid for boards too large to hold in memory.
+        if tile_size:
+            self.grid = ChunkedGrid(rows, cols, mine_count, seed=seed, tile_size=tile_size)
+        else:
+            self.grid = Grid(rows, cols, mine_count, seed=seed)
         self.mines_placed = False
+        # Optional MoveJournal; every move is appended to it after being applied.
+        self.journal = None
+
+    @classmethod
+    def from_board_code(cls, code):
+        grid = Grid.from_board_code(code)
+        game_logic = cls(grid.rows, grid.cols, grid.mine_count)
+        game_logic.grid = grid
+        game_logic.mines_placed = True
+        return game_logic
 
     def place_mines(self, safe_row, safe_col):
         self.grid.place_mines(safe_row, safe_col)
         self.mines_placed = True
 
     def reveal_cell(self, row, col):
-        print(f"Revealing cell at ({row}, {col})")
-
         if not self.mines_placed:
-            print(f"Placing mines around cell ({row}, {col})...")
             self.place_mines(row, col)
 
-        return self.grid.reveal_cell(row, col)
+        result = self.grid.reveal_cell(row, col)
+        # Clicks that change nothing are left out of the journal.
+        if self.journal is not None and result in ("safe", "mine"):
+            self.journal.record(self, "reveal", row, col)
+        triggered = (row, col) if result == "mine" else None
+        return ChangeSet(result, triggered).add(self.grid, self.grid.last_revealed)
+
+    def toggle_mark(self, row, col):
+        """Cycle an unrevealed cell through flagged, questioned and unmarked."""
+        state = self.grid.cells[self.grid._index(row, col)]
+        if state & REVEALED:
+            return ChangeSet("already_revealed")
+
+        if state & FLAGGED:
+            self.grid.set_flag(row, col, False)
+            self.grid.set_question(row, col, True)
+            result = "questioned"
+        elif state & QUESTIONED:
+            self.grid.set_question(row, col, False)
+            result = "cleared"
+        else:
+            self.grid.set_flag(row, col, True)
+            result = "flagged"
+
+        if self.journal is not None:
+            self.journal.record(self, "mark", row, col)
+
+        return ChangeSet(result).add(self.grid, [(row, col)])
+
+    def chord(self, row, col):
+        """Reveal every unflagged neighbor of a revealed number once enough flags surround it."""
+        grid = self.grid
+        index = grid._index(row, col)
+        if not grid.cells[index] & REVEALED:
+            return ChangeSet("ignored")
+
+        neighbors = list(grid.neighbors(row, col))
+        flagged_count = sum(1 for r, c in neighbors if grid.cells[grid._index(r, c)] & FLAGGED)
+        if flagged_count != grid.counts[index]:
+            return ChangeSet("ignored")
+
+        changes = ChangeSet("safe")
+        for r, c in neighbors:
+            if grid.cells[grid._index(r, c)] & (REVEALED | FLAGGED):
+                continue
+            result = grid.reveal_cell(r, c)
+            changes.add(grid, grid.last_revealed)
+            if result == "mine":
+                changes.result = "mine"
+                changes.triggered = (r, c)
+                break
+
+        if self.journal is not None:
+            self.journal.record(self, "chord", row, col)
+        return changes
+
+    def board_code(self):
+        return self.grid.board_code()
+
+    @property
+    def mines_remaining(self):
+        return self.grid.mines_remaining
 
     def check_win(self):
         """Override check_win in GameComponent."""
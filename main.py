@@ -1,17 +1,34 @@
+import time
+
+# Startup times in the profiler are measured from here.
+STARTED = time.perf_counter()
+
+import argparse
+import cProfile
+import math
+import sys
+import threading
 import pygame
-from scenes.main_menu import MainMenu
-from scenes.game_scene import GameScene
-from utils import WIDTH, HEIGHT, FPS
+from profiler import PROFILER
+from tracing import TRACE, WARNING
+from utils import WIDTH, HEIGHT, FPS, TEXT_CACHE, SPRITES, EMOJI_FRAMES
+
+# Posted by the loader thread once the menus can be shown.
+LOADING_FINISHED = pygame.event.custom_type()
 
 class Game:
     def __init__(self):
         pygame.init()
-        self.emoji_text_font = pygame.font.Font("assets/fonts/seguiemj.ttf", 24)
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
         pygame.display.set_caption("Minesweeper")
         self.clock = pygame.time.Clock()
         self.running = True
         self.scene = None
+        self.loading_error = None
+        # New games come from the no-guess board pool; toggled in the difficulty menu.
+        self.no_guess = False
+        # Font(None) is pygame's bundled font; unlike SysFont it needs no font scan.
+        self.loading_font = pygame.font.Font(None, 48)
 
     def set_scene(self, name, **kwargs):
         if name == "menu":
@@ -19,49 +36,184 @@ class Game:
             self.scene = MainMenu(self)
         elif name == "game":
             self.show_loading("Generating Game...")
-            pygame.display.flip()
+            if self.no_guess and "rows" in kwargs:
+                from board_pool import take_board
+                kwargs["board_code"] = take_board(kwargs["rows"], kwargs["cols"], kwargs["mines"],
+                                                  waiting=self.wait_while_generating)
+                if not self.running:
+                    return
+                if kwargs["board_code"] is None:
+                    TRACE.emit("generation", WARNING, "no no-guess board, starting a random one")
             from scenes.game_scene import GameScene
             self.scene = GameScene(self, **kwargs)    
         elif name == "difficulty":
             from scenes.difficulty_menu import DifficultyMenu
             self.scene = DifficultyMenu(self)
 
+    def load(self):
+        """Show the loading screen and wait, still handling window events, until
+        the loader thread has everything the first scene needs."""
+        # Rendered once, before the loader starts: SDL_ttf is not thread-safe, so
+        # repainting below only blits this surface and never touches a font.
+        text = self.render_loading()
+        self.show_loading(text=text)
+        PROFILER.mark_startup("window", STARTED)
+        threading.Thread(target=self.load_assets, name="loader", daemon=True).start()
+        while self.running:
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == LOADING_FINISHED:
+                break
+            elif event.type in (pygame.VIDEORESIZE, pygame.WINDOWEXPOSED):
+                self.show_loading(text=text)
+        if self.loading_error is not None:
+            raise self.loading_error
+        PROFILER.mark_startup("loaded", STARTED)
+
+    def load_assets(self):
+        """Runs on the loader thread. Fonts come first, since the menus need them
+        and SDL_ttf must not be used from two threads at once. The game scene and
+        its images are warmed after the menus have been released."""
+        restoring = False
+        try:
+            import scenes.main_menu
+            import scenes.difficulty_menu
+            from journal import MoveJournal
+            # The first SysFont call scans the installed fonts.
+            pygame.font.SysFont(None, 48)
+            TEXT_CACHE.prepare_status_messages()
+            restoring = MoveJournal().exists()
+            if restoring:
+                import scenes.game_scene
+        except Exception as error:
+            self.loading_error = error
+        pygame.event.post(pygame.event.Event(LOADING_FINISHED))
+        if restoring or self.loading_error is not None:
+            return
+
+        import scenes.game_scene
+        SPRITES.preload()
+        for key in EMOJI_FRAMES.keys():
+            EMOJI_FRAMES[key]
+        PROFILER.mark_startup("warm", STARTED)
+
     def run(self):
-        self.set_scene("menu")
+        self.load()
+        if not self.running:
+            pygame.quit()
+            return
 
+        from journal import MoveJournal
+        if MoveJournal().exists():
+            self.set_scene("game", restore_autosave=True)
+        else:
+            self.set_scene("menu")
+
+        # Draw before waiting so a new scene shows up without waiting for input.
+        # With --profile each phase is timed; the wait for input counts as idle.
+        profiler = PROFILER
+        first_frame = True
         while self.running:
-            events = pygame.event.get()
-            self.scene.handle_events(events)
+            profiler.start_frame()
             self.scene.update()
-            self.scene.draw(self.screen)
-            pygame.display.flip()
+            profiler.lap("update")
+            dirty_rects = self.scene.draw(self.screen)
+            if profiler.show_hud:
+                hud_rect = profiler.draw_hud(self.screen)
+                if dirty_rects is not None:
+                    dirty_rects.append(hud_rect)
+            profiler.lap("draw")
+            if dirty_rects is None:
+                pygame.display.flip()
+            elif dirty_rects:
+                pygame.display.update(dirty_rects)
+            profiler.lap("flip")
+            if first_frame:
+                PROFILER.mark_startup("first_frame", STARTED)
+                first_frame = False
             self.clock.tick(FPS)
+            events = self.wait_for_events()
+            profiler.lap("idle")
+            self.handle_profiler_keys(events)
+            self.scene.handle_events(events)
+            profiler.lap("events")
+            profiler.end_frame()
+        if "board_pool" in sys.modules:
+            sys.modules["board_pool"].shutdown()
         pygame.quit()
 
-    def show_loading(self, message="Loading..."):
+    def handle_profiler_keys(self, events):
+        """F3 shows or hides the profiler overlay."""
+        if not PROFILER.enabled:
+            return
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                PROFILER.show_hud = not PROFILER.show_hud
+                if hasattr(self.scene, "invalidate"):
+                    self.scene.invalidate()
+
+    def wait_for_events(self):
+        """Return the pending events, first sleeping until input arrives or the
+        scene's next animation step is due, so an idle game uses no CPU."""
+        timeout = self.scene.idle_timeout()
+        if timeout == 0:
+            return pygame.event.get()
+        if timeout is None:
+            first = pygame.event.wait()
+        else:
+            first = pygame.event.wait(max(1, math.ceil(timeout * 1000)))
+        events = [first] if first.type != pygame.NOEVENT else []
+        return events + pygame.event.get()
+
+    def wait_while_generating(self):
+        """Keep the window alive while a no-guess board is generated; False once the player quits."""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+                return False
+            if event.type in (pygame.VIDEORESIZE, pygame.WINDOWEXPOSED):
+                self.show_loading("Generating Game...")
+        return True
+
+    def render_loading(self, message="Loading..."):
+        return self.loading_font.render(message, True, (255, 255, 255))
+
+    def show_loading(self, message="Loading...", text=None):
         self.screen.fill((30, 30, 30))
-        font = pygame.font.SysFont(None, 48)
-        text = font.render(message, True, (255, 255, 255))
+        if text is None:
+            text = self.render_loading(message)
         rect = text.get_rect(center=(self.screen.get_width() // 2, self.screen.get_height() // 2))
         self.screen.blit(text, rect)
         pygame.display.flip()
 
-def show_loading_screen(screen):
-    screen.fill((30, 30, 30))
-    font = pygame.font.SysFont(None, 48)
-    text = font.render("Loading...", True, (255, 255, 255))
-    rect = text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
-    screen.blit(text, rect)
-    pygame.display.flip()
-    pygame.time.delay(1000)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Minesweeper")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every frame, show the overlay (F3 toggles it) and print a summary on exit")
+    parser.add_argument("--profile-output", metavar="PATH",
+                        help="with --profile, write per-frame timings to PATH.csv or cProfile stats to any other PATH")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    args = parse_args()
     game = Game()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Minesweeper")
-
-    show_loading_screen(screen)
-
-    game = Game()
-    game.screen = screen
-    game.run()
\ No newline at end of file
+    stats = None
+    if args.profile:
+        PROFILER.enable()
+        if args.profile_output and not args.profile_output.endswith(".csv"):
+            stats = cProfile.Profile()
+            stats.enable()
+    try:
+        game.run()
+    except BaseException:
+        TRACE.dump()
+        raise
+    finally:
+        if args.profile:
+            print(PROFILER.summary())
+            if stats is not None:
+                stats.disable()
+                stats.dump_stats(args.profile_output)
+            elif args.profile_output:
+                PROFILER.write_csv(args.profile_output)
@@ -0,0 +1,361 @@
+"""Exact mine probabilities for every unrevealed cell of a logic.Grid.
+
+The frontier constraints are split into independent components. Each one is
+counted with memoized backtracking, giving the number of solutions (and of
+solutions with each cell a mine) per mine count. Components are then combined
+with the unconstrained interior cells, weighted by how many ways the remaining
+mines fit in the interior. Component counts are cached by their constraints,
+so a move only recounts the components it touched.
+
+Run directly to time a full and an incremental update on a large board:
+
+    python probability.py --size 200 --density 0.16
+"""
+import argparse
+import random
+import time
+from collections import defaultdict, deque
+from math import exp, lgamma, log
+from logic import Grid, MINE, REVEALED
+from solver import Solver
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Combined mine-count distributions drop entries this far below their peak.
+PRUNE_BELOW = 1e-30
+
+def _array(values):
+    return np.array(values, dtype=float) if np is not None else list(values)
+
+def _convolve(first, second):
+    if np is not None:
+        return np.convolve(first, second)
+    result = [0.0] * (len(first) + len(second) - 1)
+    for i, a in enumerate(first):
+        for j, b in enumerate(second):
+            result[i + j] += a * b
+    return result
+
+def _correlate(values, window):
+    """result[k] = sum(window[j] * values[k + j]) for every full overlap."""
+    if np is not None:
+        return np.correlate(values, window, "valid")
+    return [sum(w * values[k + j] for j, w in enumerate(window)) for k in range(len(values) - len(window) + 1)]
+
+def _scaled(values):
+    """values scaled to a peak of 1, keeping float range over many components."""
+    peak = values.max() if np is not None else max(values)
+    if not peak:
+        return values
+    return values / peak if np is not None else [value / peak for value in values]
+
+def _trim(values, prune):
+    """_scaled values with tails below prune cut off; returns (start, values)."""
+    peak = values.max() if np is not None else max(values)
+    if not peak:
+        return 0, values
+    if np is not None:
+        keep = np.flatnonzero(values > peak * prune)
+        return keep[0], values[keep[0]:keep[-1] + 1] / peak
+    keep = [index for index, value in enumerate(values) if value > peak * prune]
+    return keep[0], [value / peak for value in values[keep[0]:keep[-1] + 1]]
+
+def _pad(values, offset, length):
+    """values placed at offset in a zero list of the given length."""
+    padded = _array([0.0] * length)
+    padded[offset:offset + len(values)] = values
+    return padded
+
+class ComponentCount:
+    """Solutions of one component: totals[m] solutions place m mines, and
+    cell_totals[cell][m] of those have that cell as a mine."""
+
+    def __init__(self, constraints):
+        self.cells = self._order(constraints)
+        self.cell_totals = {cell: defaultdict(int) for cell in self.cells}
+        self.totals = self._count(constraints)
+
+    @staticmethod
+    def _order(constraints):
+        """Visit cells breadth first so few constraints are open at a time."""
+        by_cell = defaultdict(list)
+        for unknown, _ in constraints:
+            for cell in unknown:
+                by_cell[cell].append(unknown)
+        start = min(by_cell)
+        order, seen, queue = [], {start}, deque([start])
+        while queue:
+            cell = queue.popleft()
+            order.append(cell)
+            for unknown in by_cell[cell]:
+                for neighbor in sorted(unknown - seen):
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+        return order
+
+    def _count(self, constraints):
+        cells = self.cells
+        position = {cell: pos for pos, cell in enumerate(cells)}
+        spans = [(min(position[cell] for cell in unknown), max(position[cell] for cell in unknown))
+                 for unknown, _ in constraints]
+        # open_at[pos]: constraints with cells both before and at/after pos; the
+        # backtracking state is just their remaining counts, so equal states merge.
+        open_at = [[c for c, (first, last) in enumerate(spans) if first < pos <= last]
+                   for pos in range(len(cells) + 1)]
+        touching = [[c for c, (unknown, _) in enumerate(constraints) if cell in unknown] for cell in cells]
+        slots_after = {(c, position[cell]): sum(1 for other in unknown if position[other] > position[cell])
+                       for c, (unknown, _) in enumerate(constraints) for cell in unknown}
+
+        def step(pos, state, value):
+            """State after giving cells[pos] the value, or None if a count can no longer be met."""
+            remaining = dict(zip(open_at[pos], state))
+            for c in touching[pos]:
+                left = remaining.get(c, constraints[c][1]) - value
+                if left < 0 or left > slots_after[c, pos]:
+                    return None
+                remaining[c] = left
+            return tuple(remaining[c] for c in open_at[pos + 1])
+
+        memo = {}
+
+        def backward(pos, state):
+            """Ways to fill cells[pos:], keyed by how many mines they use."""
+            key = (pos, state)
+            if key not in memo:
+                if pos == len(cells):
+                    memo[key] = {0: 1}
+                else:
+                    result = defaultdict(int)
+                    for value in (0, 1):
+                        following = step(pos, state, value)
+                        if following is not None:
+                            for mines, ways in backward(pos + 1, following).items():
+                                result[mines + value] += ways
+                    memo[key] = result
+            return memo[key]
+
+        # Forward pass: ways to reach each state, combined with the backward
+        # counts to get how often each cell is a mine.
+        forward = {(): {0: 1}}
+        for pos, cell in enumerate(cells):
+            reached = defaultdict(lambda: defaultdict(int))
+            cell_totals = self.cell_totals[cell]
+            for state, prefix in forward.items():
+                for value in (0, 1):
+                    following = step(pos, state, value)
+                    if following is None:
+                        continue
+                    suffix = backward(pos + 1, following)
+                    if not suffix:
+                        continue
+                    for before, ways_before in prefix.items():
+                        reached[following][before + value] += ways_before
+                        if value:
+                            for after, ways_after in suffix.items():
+                                cell_totals[before + 1 + after] += ways_before * ways_after
+            forward = reached
+        return dict(backward(0, ()))
+
+class ProbabilityEngine:
+    """Keeps a Solver and per-component counts in step with the board.
+
+    Call observe() with the cells each move changed, as for Solver, then
+    probabilities() for the current picture.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.solver = Solver(grid)
+        self.cache = {}
+        self.interior_probability = 0.0
+
+    def observe(self, positions):
+        self.solver.observe(positions)
+
+    def components(self):
+        """Group frontier constraints that share unknown cells."""
+        solver = self.solver
+        solver.solve()
+        constraints = [solver._constraint(index) for index in solver.frontier]
+        constraints = [constraint for constraint in constraints if constraint[0]]
+
+        parent = {}
+
+        def find(cell):
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+
+        for unknown, _ in constraints:
+            cells = iter(unknown)
+            first = next(cells)
+            root = find(parent.setdefault(first, first))
+            for cell in cells:
+                other = find(parent.setdefault(cell, cell))
+                if other != root:
+                    parent[other] = root
+
+        grouped = defaultdict(set)
+        for constraint in constraints:
+            grouped[find(next(iter(constraint[0])))].add(constraint)
+        return [frozenset(group) for group in grouped.values()]
+
+    def count(self, component):
+        result = self.cache.get(component)
+        if result is None:
+            result = ComponentCount(sorted(component, key=lambda constraint: min(constraint[0])))
+        return result
+
+    def probabilities(self):
+        """Return {(row, col): probability} for frontier and deduced cells.
+
+        Every other unrevealed cell has probability self.interior_probability.
+        """
+        grid, solver = self.grid, self.solver
+        components = self.components()
+        counts = [self.count(component) for component in components]
+        # Keep only what the current board uses; stale components never come back.
+        self.cache = dict(zip(components, counts))
+
+        unknown_cells = grid.unrevealed_safe + grid.mine_count - len(solver.safe) - len(solver.mines)
+        interior = unknown_cells - sum(len(count.cells) for count in counts)
+        mines_left = grid.mine_count - len(solver.mines)
+
+        # Ways to put the rest of the mines in the interior, as a log so large
+        # boards stay in float range.
+        def log_interior_ways(mines):
+            placed = mines_left - mines
+            if not 0 <= placed <= interior:
+                return None
+            return lgamma(interior + 1) - lgamma(placed + 1) - lgamma(interior - placed + 1)
+
+        # Tilt every distribution by tilt**mines, roughly the interior's odds
+        # per extra frontier mine, so the combined distribution stays centred
+        # and its far tails can be pruned without touching the answer.
+        frontier_cells = unknown_cells - interior
+        expected = frontier_cells * mines_left / unknown_cells if unknown_cells else 0
+        if interior >= 64 and 0 < mines_left - expected < interior:
+            tilt = (mines_left - expected) / (interior - mines_left + expected + 1)
+            prune = PRUNE_BELOW
+        else:
+            tilt, prune = 1.0, 0.0
+        log_tilt = log(tilt)
+
+        def tilted(totals):
+            """{mines: ways} as (lowest count, dense weights near 1 times tilt**mines)."""
+            low, high = min(totals), max(totals)
+            peak = max(totals.values())
+            offset = max(mines * log_tilt for mines in totals)
+            return low, _array([totals[mines] / peak * exp(mines * log_tilt - offset) if mines in totals else 0.0
+                                for mines in range(low, high + 1)])
+
+        # prefix[i]: distribution of frontier mines over the components before
+        # i, as (lowest count, weights), with negligible tails pruned.
+        weights = [tilted(count.totals) for count in counts]
+        prefix = [(0, _array([1.0]))]
+        for low, weight in weights:
+            placed, values = prefix[-1]
+            start, values = _trim(_convolve(values, weight), prune)
+            prefix.append((placed + low + start, values))
+
+        # completion[s]: weight of finishing the board (the components not yet
+        # visited, then the interior) when s frontier mines are already placed.
+        first, final = prefix[-1]
+        logs = [log_interior_ways(first + offset) for offset in range(len(final))]
+        top = max((value - (first + offset) * log_tilt for offset, value in enumerate(logs) if value is not None),
+                  default=None)
+        if top is None:
+            self.interior_probability = 0.0
+            return {}
+        completion = _array([exp(value - (first + offset) * log_tilt - top) if value is not None else 0.0
+                             for offset, value in enumerate(logs)])
+
+        total = sum(final[offset] * completion[offset] for offset in range(len(final)))
+        interior_mines = sum(final[offset] * completion[offset] * (mines_left - first - offset)
+                             for offset in range(len(final)))
+        self.interior_probability = float(interior_mines / (total * interior)) if interior else 0.0
+
+        result = {}
+        cols = grid.cols
+        for index in range(len(counts) - 1, -1, -1):
+            count, (low, weight), (placed, before) = counts[index], weights[index], prefix[index]
+            # Line completion up with every (placed + mines) this component can reach.
+            span = len(before) + len(weight) - 1
+            padded = _pad(completion, prefix[index + 1][0] - placed - low, span)
+            # given[m - low]: weight of this component's m-mine solutions,
+            # summed over everything else on the board.
+            given = [ways * reach for ways, reach in zip(weight, _correlate(padded, before))]
+            denominator = sum(given)
+            for cell in count.cells:
+                numerator = sum(given[mines - low] * (ways / count.totals[mines])
+                                for mines, ways in count.cell_totals[cell].items())
+                result[divmod(cell, cols)] = float(numerator / denominator) if denominator else 0.0
+            completion = _scaled(_correlate(padded, weight))
+
+        for cell in solver.safe:
+            result[divmod(cell, cols)] = 0.0
+        for cell in solver.mines:
+            result[divmod(cell, cols)] = 1.0
+        return result
+
+    def probability(self, row, col, probabilities=None):
+        if probabilities is None:
+            probabilities = self.probabilities()
+        return probabilities.get((row, col), self.interior_probability)
+
+    def safest_cell(self, candidates):
+        """The candidate (row, col) least likely to be a mine."""
+        probabilities = self.probabilities()
+        return min(candidates, key=lambda cell: (probabilities.get(cell, self.interior_probability), cell))
+
+def benchmark(size, density, reveal_fraction, seed):
+    rng = random.Random(seed)
+    grid = Grid(size, size, int(size * size * density), seed=seed)
+    grid.place_mines(size // 2, size // 2)
+    grid.reveal_cell(size // 2, size // 2)
+    for index, state in enumerate(grid.cells):
+        if not state & (MINE | REVEALED) and rng.random() < reveal_fraction:
+            grid.reveal_cell(*divmod(index, size))
+
+    started = time.perf_counter()
+    engine = ProbabilityEngine(grid)
+    probabilities = engine.probabilities()
+    full = time.perf_counter() - started
+
+    # Incremental cost: reveal the safest guess and update again.
+    guesses = [cell for cell, probability in probabilities.items() if probability < 1.0]
+    started = time.perf_counter()
+    if guesses:
+        row, col = min(guesses, key=probabilities.get)
+        if not grid.cells[row * size + col] & MINE:
+            grid.reveal_cell(row, col)
+            engine.observe(grid.last_revealed)
+            engine.probabilities()
+    incremental = time.perf_counter() - started
+
+    return {
+        "board": f"{size}x{size}",
+        "components": len(engine.cache),
+        "largest_component": max((len(count.cells) for count in engine.cache.values()), default=0),
+        "full_seconds": full,
+        "incremental_ms": incremental * 1000,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark exact mine probabilities.")
+    parser.add_argument("--size", type=int, default=200)
+    parser.add_argument("--density", type=float, default=0.16)
+    parser.add_argument("--reveal", type=float, default=0.3, help="fraction of safe cells revealed up front")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.size, args.density, args.reveal, args.seed)
+    print(f"{result['board']}: {result['components']} components (largest {result['largest_component']} cells), "
+          f"full update {result['full_seconds']:.2f}s, incremental move {result['incremental_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import csv
+import time
+from collections import deque
+import pygame
+
+PHASES = ("events", "update", "draw", "flip")
+COUNTERS = ("cells", "text_renders")
+CSV_FIELDS = ("frame",) + PHASES + ("idle", "total") + COUNTERS
+
+# The overlay's text is re-rendered at most this often; the frame graph every frame.
+HUD_REFRESH_SECONDS = 0.5
+HUD_GRAPH_FRAMES = 80
+HUD_GRAPH_MS = 33.0
+HUD_SIZE = (280, 58)
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+class FrameProfiler:
+    """Per-frame phase timings and counters for Game.run.
+
+    The loop calls start_frame(), then lap(phase) after each phase and
+    end_frame() at the end. The time spent sleeping for input goes to "idle"
+    and is left out of the frame time. Hot paths add to the frame's counters
+    with count(). While disabled every call returns straight away.
+    """
+
+    def __init__(self, window=600):
+        self.enabled = False
+        self.show_hud = False
+        self.window = deque(maxlen=window)
+        self.frames = []
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.current = None
+        self.last_lap = 0.0
+        self.hud_font = None
+        self.hud_text = []
+        self.hud_rendered_at = 0.0
+        # Named startup milestones, in seconds since the process started.
+        self.startup = {}
+
+    def enable(self, show_hud=True):
+        self.enabled = True
+        self.show_hud = show_hud
+
+    def mark_startup(self, name, started):
+        """Record a startup milestone; works whether or not profiling is enabled."""
+        self.startup[name] = time.perf_counter() - started
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self.current = dict.fromkeys(PHASES + ("idle",), 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.last_lap = time.perf_counter()
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to phase."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[phase] += now - self.last_lap
+        self.last_lap = now
+
+    def count(self, counter, amount=1):
+        if self.enabled:
+            self.counters[counter] += amount
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        frame = self.current
+        frame["total"] = sum(frame[phase] for phase in PHASES)
+        frame.update(self.counters)
+        frame["frame"] = len(self.frames)
+        self.frames.append(frame)
+        self.window.append(frame)
+
+    def percentiles(self, key="total"):
+        """(p50, p95, p99) of key over the rolling window, in milliseconds."""
+        values = sorted(frame[key] * 1000 for frame in self.window)
+        return tuple(percentile(values, fraction) for fraction in (0.50, 0.95, 0.99))
+
+    def summary(self):
+        lines = []
+        if self.startup:
+            lines.append("startup " + ", ".join(f"{name} {seconds * 1000:.0f} ms"
+                                                for name, seconds in self.startup.items()))
+        lines.append(f"{len(self.frames)} frames")
+        for key in PHASES + ("total",):
+            p50, p95, p99 = self.percentiles(key)
+            lines.append(f"{key:>8}  p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  p99 {p99:7.2f} ms")
+        for counter in COUNTERS:
+            values = [frame[counter] for frame in self.window]
+            lines.append(f"{counter:>12}  mean {sum(values) / max(len(values), 1):.1f} per frame, max {max(values, default=0)}")
+        return "\n".join(lines)
+
+    def write_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, CSV_FIELDS)
+            writer.writeheader()
+            for frame in self.frames:
+                writer.writerow({key: round(value * 1000, 4) if isinstance(value, float) else value
+                                 for key, value in frame.items()})
+
+    def draw_hud(self, screen):
+        """Draw the overlay in the top-right corner of the banner; returns its rect."""
+        now = time.perf_counter()
+        if self.hud_font is None:
+            self.hud_font = pygame.font.SysFont(None, 18)
+        if not self.hud_text or now - self.hud_rendered_at >= HUD_REFRESH_SECONDS:
+            # Rendered directly rather than through TEXT_CACHE, which would keep every reading.
+            p50, p95, p99 = self.percentiles()
+            latest = self.window[-1] if self.window else dict.fromkeys(PHASES + COUNTERS, 0)
+            lines = (
+                f"p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f} ms",
+                " ".join(f"{phase[:2]} {latest[phase] * 1000:.1f}" for phase in PHASES),
+                f"cells {latest['cells']}  text {latest['text_renders']}",
+            )
+            self.hud_text = [self.hud_font.render(line, True, (230, 230, 230)) for line in lines]
+            self.hud_rendered_at = now
+
+        rect = pygame.Rect((screen.get_width() - HUD_SIZE[0], 0), HUD_SIZE)
+        pygame.draw.rect(screen, (20, 20, 20), rect)
+        graph_left = rect.right - HUD_GRAPH_FRAMES - 4
+        text_area = pygame.Rect(0, 0, graph_left - rect.x - 10, 17)
+        for line, text in enumerate(self.hud_text):
+            screen.blit(text, (rect.x + 6, rect.y + 4 + line * 17), text_area)
+
+        # One bar per recent frame; red once a frame misses 60 FPS.
+        for offset, frame in enumerate(list(self.window)[-HUD_GRAPH_FRAMES:]):
+            milliseconds = frame["total"] * 1000
+            height = max(1, min(50, round(milliseconds / HUD_GRAPH_MS * 50)))
+            color = (220, 80, 60) if milliseconds > 1000 / 60 else (90, 200, 90)
+            pygame.draw.line(screen, color, (graph_left + offset, rect.bottom - 4),
+                             (graph_left + offset, rect.bottom - 4 - height))
+        return rect
+
+PROFILER = FrameProfiler()
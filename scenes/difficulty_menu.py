@@ -1,4 +1,5 @@
 import pygame
+from logic import DIFFICULTY_PRESETS
 from ui.button import Button
 
 class DifficultyMenu:
@@ -11,11 +12,11 @@ class DifficultyMenu:
 
     def setup_buttons(self):
         presets = [
-            ("Easy", lambda: self.game.set_scene("game", rows=9, cols=9, mines=10)),
-            ("Medium", lambda: self.game.set_scene("game", rows=16, cols=16, mines=40)),
-            ("Hard", lambda: self.game.set_scene("game", rows=30, cols=16, mines=99)),
-            ("Back", lambda: self.game.set_scene("menu")),
+            (name, lambda rows=rows, cols=cols, mines=mines: self.game.set_scene("game", rows=rows, cols=cols, mines=mines))
+            for name, rows, cols, mines in DIFFICULTY_PRESETS
         ]
+        presets.append((f"No guessing: {'On' if self.game.no_guess else 'Off'}", self.toggle_no_guess))
+        presets.append(("Back", lambda: self.game.set_scene("menu")))
         
         screen_w, screen_h = pygame.display.get_surface().get_size()
         button_width = 380
@@ -23,7 +24,8 @@ class DifficultyMenu:
         spacing = 20
         total_height = len(presets) * (button_height + spacing)
 
-        start_y = (screen_h - total_height) // 2 + 40
+        # Keep clear of the title.
+        start_y = max((screen_h - total_height) // 2 + 40, 110)
         center_x = (screen_w - button_width) // 2
 
         self.buttons = []
@@ -31,6 +33,14 @@ class DifficultyMenu:
             rect = pygame.Rect(center_x, start_y + i * (button_height + spacing), button_width, button_height)
             self.buttons.append(Button(label, rect, action))
 
+    def toggle_no_guess(self):
+        self.game.no_guess = not self.game.no_guess
+        if self.game.no_guess:
+            # Start filling the pools now so the first no-guess game is ready at once.
+            from board_pool import top_up_presets
+            top_up_presets()
+        self.setup_buttons()
+
     def handle_events(self, events):
         for event in events:
             if event.type == pygame.QUIT:
@@ -45,6 +55,10 @@ class DifficultyMenu:
     def update(self):
         pass
 
+    def idle_timeout(self):
+        # Nothing animates; hover and clicks arrive as events.
+        return None
+
     def draw(self, screen):
         screen.fill((200, 200, 200))
         title = self.font.render("Select Difficulty", True, (50, 50, 50))
@@ -1,13 +1,32 @@
 import pygame
 import json
 from FileManager import FileManager
+from journal import MoveJournal
 from logic import GameLogic
+from probability import ProbabilityEngine
+from profiler import PROFILER
 from status import GameStatus
 from ui.button import Button
-from utils import Cell, load_gif_frames, ROWS, COLS, CELL_SIZE, BANNER_HEIGHT, FPS, WHITE, BLACK, EMOJI_FRAMES, STATUS_MESSAGES
+from utils import Camera, Cell, cell_skin, load_gif_frames, ROWS, COLS, CELL_SIZE, BANNER_HEIGHT, FPS, WHITE, BLACK, EMOJI_FRAMES, STATUS_MESSAGES
+from utils import AnimationScheduler, EMOJI_FRAME_SECONDS
+from tracing import TRACE, DEBUG, INFO, ERROR
+from utils import TEXT_CACHE, EMOJI_FONT_PATH, STATUS_FONT_SIZE, STATUS_TEXT_COLOR, HEATMAP_LEVELS, number_font_size
+
+# Keyboard zoom (+/-) and scrolling (arrow keys, PAN_CELLS cells per press).
+ZOOM_KEYS = {pygame.K_EQUALS: 1, pygame.K_PLUS: 1, pygame.K_KP_PLUS: 1, pygame.K_MINUS: -1, pygame.K_KP_MINUS: -1}
+PAN_KEYS = {pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0), pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1)}
+PAN_CELLS = 3
+
+# Posted from the save worker thread when a background save finishes.
+SAVE_FINISHED = pygame.event.custom_type()
+
+def shade(probability):
+    """Round a probability to a heatmap level; only a change of shade is worth a redraw."""
+    return round(probability * HEATMAP_LEVELS) / HEATMAP_LEVELS
 
 class GameScene:
-    def __init__(self, game, rows=9, cols=9, mines=10, grid_data=None, game_over=False):
+    def __init__(self, game, rows=9, cols=9, mines=10, grid_data=None, game_over=False, restore_autosave=False,
+                 journal=None, board_code=None):
         
         self.FileManager = FileManager()
         
@@ -15,6 +34,12 @@ class GameScene:
         self.rows, self.cols, self.mines = rows, cols, mines
 
         self.is_paused = False
+        # ProbabilityEngine while the mine probability heatmap (H) is shown.
+        self.heatmap = None
+        # Cells with a probability of their own; every other unrevealed cell is
+        # drawn with the shared heatmap_interior shade.
+        self.heatmap_cells = set()
+        self.heatmap_interior = None
 
         self.resume_button = Button("Resume", pygame.Rect(250, 200, 300, 60), self.resume_game)
         self.save_button = Button("Save", pygame.Rect(250, 300, 300, 60), self.save_game)
@@ -28,61 +53,105 @@ class GameScene:
         self.window_width = max(self.window_width, min_window_width)
         self.window_height = max(self.window_height, min_window_height)
 
+        # Window size from the latest VIDEORESIZE, applied once per frame by update().
+        self.pending_resize = None
+        self.camera = Camera(self.rows, self.cols)
         self.update_grid_size()
 
         if grid_data:
-            self.grid = [[Cell(cell_data['row'], cell_data['col'], self.cell_size) for cell_data in row] for row in grid_data]
+            self.grid = [[Cell(cell_data['row'], cell_data['col']) for cell_data in row] for row in grid_data]
         else:
-            self.grid = [[Cell(row, col, self.cell_size) for col in range(self.cols)] for row in range(self.rows)]
+            self.grid = [[Cell(row, col) for col in range(self.cols)] for row in range(self.rows)]
 
-        self.game.screen = pygame.display.set_mode((self.window_width, self.window_height), pygame.RESIZABLE)
-
-        self.game_logic = GameLogic(self.rows, self.cols, self.mines)
+        # A board code, e.g. from the no-guess pool, comes with its mines and first click.
+        if board_code:
+            self.game_logic = GameLogic.from_board_code(board_code)
+        else:
+            self.game_logic = GameLogic(self.rows, self.cols, self.mines)
 
         self.status = GameStatus(EMOJI_FRAMES, STATUS_MESSAGES)
-        self.emoji_frame_timer = 0
+        self.animations = AnimationScheduler()
+        self.animations.every(EMOJI_FRAME_SECONDS, self.status.update_frame)
         self.game_over = False
 
+        # Retained rendering: the board is rasterized once into board_surface and
+        # afterwards only cells listed in dirty_cells are redrawn and presented.
+        self.board_surface = None
+        self.dirty_cells = set()
+        self.needs_full_redraw = True
+        self.drawn_banner_state = None
+
+        self.journal = journal or MoveJournal()
+        game_data = self.journal.restore() if restore_autosave else None
+        if game_data:
+            self.adopt_game_data(game_data)
+        else:
+            self.journal.start(self.game_logic)
+            if board_code:
+                # The board is only guaranteed solvable from its own first click, so make it.
+                self.apply_changes(self.game_logic.reveal_cell(*self.game_logic.grid.first_click))
+
     def resume_game(self):
         """Function to resume the game"""
-        self.is_paused = False
+        self.set_paused(False)
 
-    def update_grid_size(self):
-        max_cell_w = self.window_width // self.cols
-        max_cell_h = (self.window_height - BANNER_HEIGHT) // self.rows
-        self.cell_size = min(max_cell_w, max_cell_h)
-
-        self.saved_cell_states = {}
-        for row in range(self.rows):
-            for col in range(self.cols):
-                cell = self.grid[row][col] if hasattr(self, 'grid') else None  
-                if cell:
-                    self.saved_cell_states[(row, col)] = {
-                        "is_flagged": cell.is_flagged,
-                        "is_questioned": cell.is_questioned
-                    }
-
-        grid_width = self.cols * self.cell_size
-        grid_height = self.rows * self.cell_size
-        total_height = grid_height + BANNER_HEIGHT
-
-        self.window_width = max(grid_width, 400)
-        self.window_height = max(total_height, 400)
+    def set_paused(self, paused):
+        # The pause menu and the board each cover the whole window.
+        self.is_paused = paused
+        self.invalidate()
 
+    def update_grid_size(self):
+        """Zoom the board to fit the window (within the readable range) and
+        shrink the window around a board smaller than it."""
+        camera = self.camera
+        camera.rows, camera.cols = self.rows, self.cols
+        camera.fit(self.board_area())
+
+        self.window_width = max(min(self.cols * camera.cell_size, self.window_width), 400)
+        self.window_height = max(min(self.rows * camera.cell_size + BANNER_HEIGHT, self.window_height), 400)
         self.game.screen = pygame.display.set_mode((self.window_width, self.window_height), pygame.RESIZABLE)
 
-        self.left_margin = (self.window_width - grid_width) // 2
-        self.top_margin = (self.window_height - total_height) // 2
-
-        self.grid = [[Cell(row, col, self.cell_size) for col in range(self.cols)] for row in range(self.rows)]
+        camera.set_area(self.board_area())
+        self.relayout()
+
+    def board_area(self):
+        """The part of the window below the banner that the board may use."""
+        return pygame.Rect(0, BANNER_HEIGHT, self.window_width, self.window_height - BANNER_HEIGHT)
+
+    def relayout(self):
+        """Pick up a new cell size or viewport from the camera. Cells keep their
+        state; only the shared skin and cached text change."""
+        self.cell_size = self.camera.cell_size
+        self.skin = cell_skin(self.cell_size)
+        self.invalidate()
+
+        TEXT_CACHE.evict({number_font_size(self.cell_size), STATUS_FONT_SIZE})
+        TEXT_CACHE.prepare_numbers(self.cell_size)
+        TEXT_CACHE.prepare_status_messages()
+
+    def build_cells(self):
+        """Create the UI cells for a new board and fill them from the logic grid."""
+        self.grid = [[Cell(row, col) for col in range(self.cols)] for row in range(self.rows)]
+        self.heatmap_cells = set()
+        self.invalidate()
+        self.sync_all_cells()
+        self.refresh_heatmap()
 
-        for row in range(self.rows):
-            for col in range(self.cols):
-                if (row, col) in self.saved_cell_states:
-                    state = self.saved_cell_states[(row, col)]
-                    cell = self.grid[row][col]
-                    cell.is_flagged = state["is_flagged"]
-                    cell.is_questioned = state["is_questioned"]
+    def apply_resize(self):
+        """Lay the board out again for the last VIDEORESIZE seen, so a burst of
+        resize events while dragging the window edge costs one relayout."""
+        if self.pending_resize is None:
+            return
+        width, height = self.pending_resize
+        self.pending_resize = None
+        self.window_width, self.window_height = max(width, 400), max(height, 400)
+        if (width, height) != (self.window_width, self.window_height):
+            self.game.screen = pygame.display.set_mode((self.window_width, self.window_height), pygame.RESIZABLE)
+        else:
+            # pygame 2 resizes the display surface itself.
+            self.game.screen = pygame.display.get_surface()
+        self.camera.fit(self.board_area())
+        self.relayout()
     
     def handle_events(self, events):
         for event in events:
@@ -91,33 +160,51 @@ class GameScene:
 
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    self.is_paused = not self.is_paused
+                    self.set_paused(not self.is_paused)
+                elif event.key == pygame.K_F9:
+                    TRACE.dump()
+                elif event.key == pygame.K_h and not self.is_paused:
+                    self.toggle_heatmap()
+                elif event.key in ZOOM_KEYS and not self.is_paused:
+                    self.zoom(self.camera.cell_size + ZOOM_KEYS[event.key] * max(1, self.camera.cell_size // 8))
+                elif event.key in PAN_KEYS and not self.is_paused:
+                    dx, dy = PAN_KEYS[event.key]
+                    step = PAN_CELLS * self.camera.cell_size
+                    self.pan(dx * step, dy * step)
+
+            elif event.type == pygame.MOUSEWHEEL and not self.is_paused:
+                self.zoom(self.camera.cell_size + event.y * max(1, self.camera.cell_size // 8), pygame.mouse.get_pos())
+
+            elif event.type == pygame.MOUSEMOTION and event.buttons[1] and not self.is_paused:
+                # Drag with the middle button held to scroll.
+                self.pan(-event.rel[0], -event.rel[1])
+
+            elif event.type == SAVE_FINISHED:
+                if event.error:
+                    TRACE.emit("io", ERROR, "error while saving the game", error=event.error)
+                else:
+                    TRACE.emit("io", INFO, "background save finished")
 
             elif event.type == pygame.VIDEORESIZE:
-                self.window_width, self.window_height = event.size
-                self.window_width = max(self.window_width, 400)
-                self.window_height = max(self.window_height, 400)
-                self.update_grid_size()
-
-                self.game.screen = pygame.display.set_mode((self.window_width, self.window_height), pygame.RESIZABLE)
+                self.pending_resize = event.size
 
-                self.grid = [[Cell(row, col, self.cell_size) for col in range(self.cols)] for row in range(self.rows)]
-                self.sync_all_cells()
+            elif event.type == pygame.WINDOWEXPOSED:
+                # The window contents were lost; dirty rects alone won't restore them.
+                self.invalidate()
 
             if self.is_paused:
+                # The pause menu is static; repaint it only for input, e.g. button hover.
+                self.invalidate()
                 self.resume_button.handle_event(event)
                 self.save_button.handle_event(event)
                 self.load_button.handle_event(event)
                 self.exit_button.handle_event(event)
 
             elif event.type == pygame.MOUSEBUTTONDOWN and not self.game_over:
-                x, y = pygame.mouse.get_pos()
-                if y < BANNER_HEIGHT:
-                    return
-                col = (x - self.left_margin) // self.cell_size
-                row = (y - BANNER_HEIGHT) // self.cell_size
-                if not (0 <= row < self.rows and 0 <= col < self.cols):
-                    return
+                cell = self.camera.screen_to_cell(*event.pos)
+                if cell is None:
+                    continue
+                row, col = cell
 
                 if pygame.mouse.get_pressed(3) == (1, 0, 1):
                     self.handle_chord_click(row, col)
@@ -129,44 +216,116 @@ class GameScene:
                     self.handle_right_click(row, col)
 
     def update(self):
-        self.emoji_frame_timer += 1
-        if self.emoji_frame_timer >= 4:
-            self.status.update_frame()
-            self.emoji_frame_timer = 0
-
-    def draw(self, screen):
-        screen.fill((160, 160, 160))
-        self.draw_banner(screen)
-        for row in self.grid:
-            for cell in row:
-                x_pos = self.left_margin + cell.col * self.cell_size
-                y_pos = self.top_margin + BANNER_HEIGHT + cell.row * self.cell_size
-
-                cell.rect = pygame.Rect(x_pos, y_pos, self.cell_size, self.cell_size)
-        
-                cell.draw(screen, cell.rect)
-
+        self.apply_resize()
+        self.animations.run_due()
+
+    def idle_timeout(self):
+        """How long the main loop may sleep waiting for input: 0 with work
+        pending, None to wait for the next event, else seconds until the next
+        emoji frame. A paused game only changes in response to input."""
+        if self.pending_resize is not None or self.needs_full_redraw or self.dirty_cells:
+            return 0
         if self.is_paused:
-            pause_background = pygame.Rect(0, 0, self.window_width, self.window_height)
-            pygame.draw.rect(screen, (0, 0, 0), pause_background)
+            return None
+        return self.animations.time_until_next()
+
+    def invalidate(self):
+        """Repaint the whole window on the next draw."""
+        self.needs_full_redraw = True
 
-            button_width = 300
-            button_height = 60
-            button_spacing = 20
+    def mark_dirty(self, row, col):
+        self.dirty_cells.add((row, col))
 
-            total_buttons_height = (button_height * 4) + (button_spacing * 3)
+    def board_rect(self):
+        return self.camera.viewport
 
-            start_y = (self.window_height - total_buttons_height) // 2
+    def zoom(self, cell_size, anchor=None):
+        if self.camera.zoom(cell_size, anchor):
+            self.relayout()
 
-            self.resume_button.rect.topleft = (self.window_width // 2 - button_width // 2, start_y)
-            self.save_button.rect.topleft = (self.window_width // 2 - button_width // 2, start_y + button_height + button_spacing)
-            self.load_button.rect.topleft = (self.window_width // 2 - button_width // 2, start_y + 2 * (button_height + button_spacing))
-            self.exit_button.rect.topleft = (self.window_width // 2 - button_width // 2, start_y + 3 * (button_height + button_spacing))
+    def pan(self, dx, dy):
+        if self.camera.pan(dx, dy):
+            self.invalidate()
 
-            self.resume_button.draw(screen, center_text=True)
-            self.save_button.draw(screen, center_text=True)
-            self.load_button.draw(screen, center_text=True)
-            self.exit_button.draw(screen, center_text=True)
+    def draw(self, screen):
+        """Draw the scene and return the screen rects that changed, or None after a full repaint."""
+        if self.is_paused:
+            if not self.needs_full_redraw:
+                return []
+            self.draw_pause_menu(screen)
+            self.needs_full_redraw = False
+            return None
+
+        camera = self.camera
+        board_rect = self.board_rect()
+        # Only cells inside the viewport are drawn, so the cost follows the
+        # window size rather than the board size.
+        visible_rows, visible_cols = camera.visible_cells()
+
+        if self.needs_full_redraw or self.board_surface is None:
+            if TRACE.wants("render", DEBUG):
+                TRACE.emit("render", DEBUG, "full repaint", rows=len(visible_rows), cols=len(visible_cols),
+                           cell_size=self.cell_size)
+            if self.board_surface is None or self.board_surface.get_size() != board_rect.size:
+                self.board_surface = pygame.Surface(board_rect.size)
+            skin = self.skin
+            for row in visible_rows:
+                grid_row = self.grid[row]
+                for col in visible_cols:
+                    grid_row[col].draw(self.board_surface, camera.cell_rect(row, col), skin, self.heatmap_interior)
+            PROFILER.count("cells", len(visible_rows) * len(visible_cols))
+
+            screen.fill((160, 160, 160))
+            self.draw_banner(screen)
+            screen.blit(self.board_surface, board_rect)
+
+            self.dirty_cells.clear()
+            self.needs_full_redraw = False
+            return None
+
+        dirty_rects = []
+        if self.banner_state() != self.drawn_banner_state:
+            dirty_rects.append(self.draw_banner(screen))
+
+        surface_rect = self.board_surface.get_rect()
+        for row, col in self.dirty_cells:
+            if row not in visible_rows or col not in visible_cols:
+                continue
+            cell_rect = camera.cell_rect(row, col)
+            self.grid[row][col].draw(self.board_surface, cell_rect, self.skin, self.heatmap_interior)
+            PROFILER.count("cells")
+            cell_rect = cell_rect.clip(surface_rect)
+            screen_rect = cell_rect.move(board_rect.topleft)
+            screen.blit(self.board_surface, screen_rect, cell_rect)
+            dirty_rects.append(screen_rect)
+        self.dirty_cells.clear()
+
+        return dirty_rects
+
+    def draw_pause_menu(self, screen):
+        pause_background = pygame.Rect(0, 0, self.window_width, self.window_height)
+        pygame.draw.rect(screen, (0, 0, 0), pause_background)
+
+        button_width = 300
+        button_height = 60
+        button_spacing = 20
+
+        total_buttons_height = (button_height * 4) + (button_spacing * 3)
+
+        start_y = (self.window_height - total_buttons_height) // 2
+
+        self.resume_button.rect.topleft = (self.window_width // 2 - button_width // 2, start_y)
+        self.save_button.rect.topleft = (self.window_width // 2 - button_width // 2, start_y + button_height + button_spacing)
+        self.load_button.rect.topleft = (self.window_width // 2 - button_width // 2, start_y + 2 * (button_height + button_spacing))
+        self.exit_button.rect.topleft = (self.window_width // 2 - button_width // 2, start_y + 3 * (button_height + button_spacing))
+
+        self.resume_button.draw(screen, center_text=True)
+        self.save_button.draw(screen, center_text=True)
+        self.load_button.draw(screen, center_text=True)
+        self.exit_button.draw(screen, center_text=True)
+
+    def banner_state(self):
+        return (self.status.current_key, self.status.frame_index, self.status.get_text())
 
     def draw_banner(self, screen):
         banner_rect = pygame.Rect(0, 0, self.game.screen.get_width(), BANNER_HEIGHT)
@@ -176,87 +335,107 @@ class GameScene:
         emoji_frame = self.status.get_frame()
         screen.blit(emoji_frame, (10, 6))
 
-        text_surface = self.game.emoji_text_font.render(self.status.get_text(), True, (30, 30, 30))
+        text_surface = TEXT_CACHE.render(self.status.get_text(), STATUS_TEXT_COLOR, STATUS_FONT_SIZE, EMOJI_FONT_PATH)
         text_rect = text_surface.get_rect(midleft=(60, BANNER_HEIGHT // 2))
         screen.blit(text_surface, text_rect)
 
+        self.drawn_banner_state = self.banner_state()
+        return banner_rect.inflate(0, 2)
+
     def handle_left_click(self, row, col):
         cell = self.grid[row][col]
         if cell.is_flagged or cell.is_questioned:
             return
-        result = self.game_logic.reveal_cell(row, col)
-        self.sync_all_cells()
-        if result == "mine":
-            cell.was_triggered = True
-            self.status.set("shocked")
-            self.game_over = True
-            self.reveal_all_cells()
-        elif result == "safe":
+        changes = self.game_logic.reveal_cell(row, col)
+        self.apply_changes(changes)
+        if changes.result == "mine":
+            self.end_game("shocked")
+        elif changes.result == "safe":
             self.status.set("happy")
             if self.game_logic.check_win():
-                self.status.set("win")
-                self.game_over = True
-                self.reveal_all_cells()
+                self.end_game("win")
 
     def handle_right_click(self, row, col):
-        cell = self.grid[row][col]
-        if cell.is_revealed:
-            return
-
-        if cell.is_flagged:
-            cell.is_flagged = False
-            cell.is_questioned = True
-        elif cell.is_questioned:
-            cell.is_questioned = False
-        else:
-            cell.is_flagged = True
-
-        self.game_logic.grid.grid[row][col]['is_flagged'] = cell.is_flagged
+        self.apply_changes(self.game_logic.toggle_mark(row, col))
 
     def handle_chord_click(self, row, col):
-        flagged_count = 0
-        for dr in (-1, 0, 1):
-            for dc in (-1, 0, 1):
-                nr, nc = row + dr, col + dc
-                if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                    if self.grid[nr][nc].is_flagged:
-                        flagged_count += 1
-
-        logic_cell = self.game_logic.grid.grid[row][col]
-        if not logic_cell['is_revealed']:
+        changes = self.game_logic.chord(row, col)
+        if changes.result == "ignored":
             return
 
-        if flagged_count == logic_cell['neighbor_mines']:
-            for dr in (-1, 0, 1):
-                for dc in (-1, 0, 1):
-                    nr, nc = row + dr, col + dc
-                    if dr == 0 and dc == 0:
-                        continue
-                    if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                        neighbor = self.grid[nr][nc]
-                        if not neighbor.is_revealed and not neighbor.is_flagged:
-                            result = self.game_logic.reveal_cell(nr, nc)
-                            if result == "mine":
-                                neighbor.was_triggered = True
-                                self.status.set("shocked")
-                                self.game_over = True
-                                self.reveal_all_cells()
-                                return
-
-            self.sync_all_cells()
+        self.apply_changes(changes)
 
-            if self.game_logic.check_win():
-                self.status.set("win")
-                self.game_over = True
-                self.reveal_all_cells()
-            else:
-                self.status.set("happy")
+        if changes.result == "mine":
+            self.end_game("shocked")
+        elif self.game_logic.check_win():
+            self.end_game("win")
+        else:
+            self.status.set("happy")
+
+    def end_game(self, status_key):
+        self.status.set(status_key)
+        self.game_over = True
+        if self.heatmap is not None:
+            self.heatmap = None
+            self.refresh_heatmap()
+        self.reveal_all_cells()
+        # A finished game has nothing worth restoring on the next launch.
+        self.game_logic.journal = None
+        self.journal.discard()
+
+    def apply_changes(self, changes):
+        """Copy the cells touched by a move from the logic grid into the UI grid."""
+        for (row, col), state in changes.cells.items():
+            ui_cell = self.grid[row][col]
+            ui_cell.is_revealed = state['is_revealed']
+            ui_cell.neighbor_mines = state['neighbor_mines']
+            ui_cell.is_flagged = state['is_flagged']
+            ui_cell.is_questioned = state['is_questioned']
+            if ui_cell.is_flagged or ui_cell.is_questioned:
+                ui_cell.was_triggered = False
+            self.mark_dirty(row, col)
+
+        if changes.triggered:
+            self.grid[changes.triggered[0]][changes.triggered[1]].was_triggered = True
+
+        if self.heatmap is not None:
+            self.heatmap.observe(changes.cells)
+            self.refresh_heatmap(changes.cells)
+
+    def toggle_heatmap(self):
+        if self.game_over:
+            return
+        self.heatmap = None if self.heatmap is not None else ProbabilityEngine(self.game_logic.grid)
+        self.refresh_heatmap()
+
+    def refresh_heatmap(self, changed=()):
+        """Copy mine probabilities onto the cells that have one of their own, or
+        clear them when the heatmap is off. Only those cells and the ones in
+        changed are visited; a new interior shade repaints the viewport instead."""
+        probabilities = self.heatmap.probabilities() if self.heatmap is not None else {}
+        interior = shade(self.heatmap.interior_probability) if self.heatmap is not None else None
+        if interior != self.heatmap_interior:
+            self.heatmap_interior = interior
+            self.invalidate()
+
+        shaded = set()
+        for row, col in self.heatmap_cells.union(probabilities, changed):
+            cell = self.grid[row][col]
+            probability = None
+            if (row, col) in probabilities and not cell.is_revealed:
+                probability = shade(probabilities[(row, col)])
+                shaded.add((row, col))
+            if probability != cell.mine_probability:
+                cell.mine_probability = probability
+                self.mark_dirty(row, col)
+        self.heatmap_cells = shaded
 
     def sync_all_cells(self):
         for row_index in range(self.rows):
             for col_index in range(self.cols):
                 logic_cell = self.game_logic.grid.grid[row_index][col_index]
                 ui_cell = self.grid[row_index][col_index]
+                before = ui_cell.visual_state()
                 if logic_cell['is_revealed']:
                     ui_cell.reveal()
                     ui_cell.neighbor_mines = logic_cell['neighbor_mines']
@@ -269,50 +448,63 @@ class GameScene:
                 if ui_cell.is_flagged or ui_cell.is_questioned:
                     ui_cell.was_triggered = False
 
+                if ui_cell.visual_state() != before:
+                    self.mark_dirty(row_index, col_index)
+
     def reveal_all_cells(self):
-        self.sync_all_cells()
-        for row_index in range(self.rows):
-            for col_index in range(self.cols):
-                cell = self.grid[row_index][col_index]
-                cell.logic_cell_ref = self.game_logic.grid.grid[row_index][col_index]
-                cell.game_over = True
+        """Show mines and flag verdicts; only mine and flagged cells change at game over."""
+        logic_grid = self.game_logic.grid
+        for row_index, col_index in logic_grid.mine_positions() + logic_grid.flagged_positions():
+            cell = self.grid[row_index][col_index]
+            cell.logic_cell_ref = logic_grid.grid[row_index][col_index]
+            cell.game_over = True
+            self.mark_dirty(row_index, col_index)
 
     def save_game(self):
         """Function to save the game state"""
         try:
-            self.FileManager.save_game(self.grid, self.rows, self.cols, self.mines, self.game_over, self.is_paused)
-            self.is_paused = False
-            print("Game saved successfully, unpaused.")
+            pending = self.FileManager.save_game_async(self.game_logic, self.game_over, self.is_paused)
+            pending.add_done_callback(self.post_save_result)
+            self.set_paused(False)
+            TRACE.emit("io", INFO, "save requested, unpaused")
         except Exception as e:
-            print(f"Error while saving the game: {e}")
+            TRACE.emit("io", ERROR, "error while saving the game", error=e)
+
+    @staticmethod
+    def post_save_result(pending):
+        """Runs on the save worker; hands the outcome back to the event loop."""
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(SAVE_FINISHED, error=pending.exception()))
 
     def load_game(self):
         """Function to load the game state"""
-        print("Loading the game...")
+        TRACE.emit("io", INFO, "loading the game")
         game_data = self.FileManager.load_game()
 
         if game_data:
-            self.rows = game_data['rows']
-            self.cols = game_data['cols']
-            self.mines = game_data['mines']
-            self.game_over = game_data['game_over']
-            self.is_paused = game_data['is_paused']
-            self.grid = [[Cell(cell_data['row'], cell_data['col'], self.cell_size) for cell_data in row]
-                        for row in game_data['grid']]
-
-            for row_index, row in enumerate(self.grid):
-                for col_index, cell in enumerate(row):
-                    cell_data = game_data['grid'][row_index][col_index]
-                    cell.is_revealed = cell_data['is_revealed']
-                    cell.is_flagged = cell_data['is_flagged']
-                    cell.is_questioned = cell_data['is_questioned']
-                    cell.neighbor_mines = cell_data['neighbor_mines']
-
-            print("Game loaded!")
-            self.is_paused = False
+            self.adopt_game_data(game_data)
+            self.journal.start(self.game_logic)
+
+            TRACE.emit("io", INFO, "game loaded", rows=self.rows, cols=self.cols)
+            self.set_paused(False)
         else:
-            print("No saved game found!")
+            TRACE.emit("io", INFO, "nothing to load")
+
+    def adopt_game_data(self, game_data):
+        """Switch to a game restored by FileManager or MoveJournal."""
+        self.rows = game_data['rows']
+        self.cols = game_data['cols']
+        self.mines = game_data['mines']
+        self.game_over = game_data['game_over']
+        self.set_paused(game_data['is_paused'])
+        self.game_logic = game_data['logic']
+        if self.heatmap is not None:
+            self.heatmap = ProbabilityEngine(self.game_logic.grid)
+        self.status.set("win" if self.game_over and self.game_logic.check_win()
+                        else "shocked" if self.game_over else "neutral")
+        self.update_grid_size()
+        self.build_cells()
 
     def exit_to_main_menu(self):
         self.game.set_scene("menu")
-        print("Exiting to main menu...")
\ No newline at end of file
+        TRACE.emit("render", INFO, "exiting to main menu")
\ No newline at end of file
@@ -57,6 +57,10 @@ class MainMenu:
     def update(self):
         pass
 
+    def idle_timeout(self):
+        # Nothing animates; hover and clicks arrive as events.
+        return None
+
     def draw(self, screen):
         screen.fill((200, 200, 200))
 
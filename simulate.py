@@ -0,0 +1,234 @@
+"""Play complete games headlessly to measure speed and strategy win rates.
+
+    python simulate.py --difficulty easy hard --games 2000 --strategy deduction
+    python simulate.py --custom 100x100x1500 --workers 4 --json
+    python simulate.py --difficulty hard --strategy probability
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from logic import DIFFICULTY_PRESETS, GameLogic, REVEALED, FLAGGED
+from probability import ProbabilityEngine
+from solver import Solver
+
+class RandomStrategy:
+    """Reveals a uniformly random unrevealed cell every move, including the first."""
+    name = "random"
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def start(self, game_logic):
+        self._prepare(game_logic)
+        return self.pop_unrevealed(game_logic.grid)
+
+    def _prepare(self, game_logic):
+        grid = game_logic.grid
+        # Cells still worth clicking; entries uncovered by flood fill are
+        # dropped lazily when they come up.
+        self.candidates = list(range(grid.rows * grid.cols))
+
+    def pop_unrevealed(self, grid):
+        candidates = self.candidates
+        while candidates:
+            position = self.rng.randrange(len(candidates))
+            index = candidates[position]
+            candidates[position] = candidates[-1]
+            candidates.pop()
+            if not grid.cells[index] & (REVEALED | FLAGGED):
+                return divmod(index, grid.cols)
+        return None
+
+    def observe(self, changes):
+        pass
+
+    def next_move(self, game_logic):
+        cell = self.pop_unrevealed(game_logic.grid)
+        return ("reveal",) + cell if cell else None
+
+class FirstSafeClickStrategy(RandomStrategy):
+    """Opens in the middle of the board, where the guaranteed safe zone is largest, then guesses."""
+    name = "first-safe-click"
+
+    def start(self, game_logic):
+        self._prepare(game_logic)
+        grid = game_logic.grid
+        return grid.rows // 2, grid.cols // 2
+
+class DeductionStrategy(FirstSafeClickStrategy):
+    """Reveals cells the solver proves safe and guesses among the rest only when stuck."""
+    name = "deduction"
+
+    def start(self, game_logic):
+        self.solver = Solver(game_logic.grid)
+        return super().start(game_logic)
+
+    def observe(self, changes):
+        self.solver.observe(changes.cells)
+
+    def next_move(self, game_logic):
+        safe, mines = self.solver.solve()
+        if safe:
+            return ("reveal",) + next(iter(safe))
+
+        grid = game_logic.grid
+        while True:
+            cell = self.pop_unrevealed(grid)
+            if cell is None or cell not in mines:
+                return ("reveal",) + cell if cell else None
+
+class ProbabilityStrategy(DeductionStrategy):
+    """Like deduction, but guesses the cell least likely to be a mine."""
+    name = "probability"
+
+    def start(self, game_logic):
+        first = super().start(game_logic)
+        self.engine = ProbabilityEngine(game_logic.grid)
+        self.solver = self.engine.solver
+        return first
+
+    def observe(self, changes):
+        self.engine.observe(changes.cells)
+
+    def next_move(self, game_logic):
+        safe, _ = self.solver.solve()
+        if safe:
+            return ("reveal",) + next(iter(safe))
+
+        probabilities = self.engine.probabilities()
+        best = min((cell for cell, probability in probabilities.items() if probability < 1.0),
+                   key=probabilities.get, default=None)
+        if best is None or self.engine.interior_probability < probabilities[best]:
+            # Any cell off the frontier is as good as another.
+            grid = game_logic.grid
+            while True:
+                cell = self.pop_unrevealed(grid)
+                if cell is None:
+                    break
+                if cell not in probabilities:
+                    return ("reveal",) + cell
+        return ("reveal",) + best if best else None
+
+STRATEGIES = {strategy.name: strategy for strategy in
+              (RandomStrategy, FirstSafeClickStrategy, DeductionStrategy, ProbabilityStrategy)}
+
+def play_game(rows, cols, mines, seed, strategy_name):
+    """Play one game to the end; returns (won, moves, phase timings in seconds)."""
+    rng = random.Random(seed)
+    game_logic = GameLogic(rows, cols, mines, seed=rng.getrandbits(32))
+    strategy = STRATEGIES[strategy_name](rng)
+    timings = {"generation": 0.0, "strategy": 0.0, "moves": 0.0}
+
+    started = time.perf_counter()
+    row, col = strategy.start(game_logic)
+    placed = time.perf_counter()
+    game_logic.place_mines(row, col)
+    timings["strategy"] += placed - started
+    timings["generation"] += time.perf_counter() - placed
+
+    move = ("reveal", row, col)
+    moves = 0
+    while move is not None:
+        started = time.perf_counter()
+        action, row, col = move
+        if action == "reveal":
+            changes = game_logic.reveal_cell(row, col)
+        else:
+            changes = game_logic.toggle_mark(row, col)
+        moves += 1
+        if changes.result == "mine":
+            timings["moves"] += time.perf_counter() - started
+            return False, moves, timings
+        if game_logic.check_win():
+            timings["moves"] += time.perf_counter() - started
+            return True, moves, timings
+
+        decided = time.perf_counter()
+        timings["moves"] += decided - started
+        strategy.observe(changes)
+        move = strategy.next_move(game_logic)
+        timings["strategy"] += time.perf_counter() - decided
+
+    return game_logic.check_win(), moves, timings
+
+def run_batch(rows, cols, mines, strategy_name, base_seed, worker, games):
+    """Play games in one worker; seeds depend only on base_seed and the worker index."""
+    seeds = random.Random(f"{base_seed}:{worker}")
+    totals = {"games": 0, "wins": 0, "moves": 0, "generation": 0.0, "strategy": 0.0, "moves_time": 0.0}
+    for _ in range(games):
+        won, moves, timings = play_game(rows, cols, mines, seeds.getrandbits(64), strategy_name)
+        totals["games"] += 1
+        totals["wins"] += won
+        totals["moves"] += moves
+        totals["generation"] += timings["generation"]
+        totals["strategy"] += timings["strategy"]
+        totals["moves_time"] += timings["moves"]
+    return totals
+
+def simulate(rows, cols, mines, strategy_name="deduction", games=1000, workers=None, base_seed=0):
+    workers = workers or os.cpu_count() or 1
+    shares = [games // workers + (1 if worker < games % workers else 0) for worker in range(workers)]
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_batch, rows, cols, mines, strategy_name, base_seed, worker, share)
+                   for worker, share in enumerate(shares) if share]
+        batches = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    played = sum(batch["games"] for batch in batches)
+    per_game = lambda key: sum(batch[key] for batch in batches) / max(played, 1)
+    return {
+        "board": f"{rows}x{cols}x{mines}",
+        "strategy": strategy_name,
+        "games": played,
+        "workers": workers,
+        "seconds": elapsed,
+        "games_per_second": played / elapsed if elapsed else 0.0,
+        "win_rate": sum(batch["wins"] for batch in batches) / max(played, 1),
+        "moves_per_game": per_game("moves"),
+        "ms_per_game": {
+            "generation": per_game("generation") * 1000,
+            "strategy": per_game("strategy") * 1000,
+            "moves": per_game("moves_time") * 1000,
+        },
+    }
+
+def parse_custom(text):
+    rows, cols, mines = (int(part) for part in text.lower().split("x"))
+    return f"{rows}x{cols}", rows, cols, mines
+
+def main(argv=None):
+    presets = {name.lower(): (name, rows, cols, mines) for name, rows, cols, mines in DIFFICULTY_PRESETS}
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--difficulty", nargs="*", choices=sorted(presets), default=[],
+                        help="difficulty presets to simulate (default: all, unless --custom is given)")
+    parser.add_argument("--custom", nargs="*", type=parse_custom, default=[], metavar="ROWSxCOLSxMINES")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="deduction")
+    parser.add_argument("--games", type=int, default=1000, help="games per board")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; the same seed replays the same games")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per board")
+    args = parser.parse_args(argv)
+
+    boards = [presets[name] for name in args.difficulty] + args.custom
+    if not boards:
+        boards = list(presets.values())
+
+    for label, rows, cols, mines in boards:
+        report = simulate(rows, cols, mines, args.strategy, args.games, args.workers, args.seed)
+        report["label"] = label
+        if args.json:
+            print(json.dumps(report))
+        else:
+            timing = report["ms_per_game"]
+            print(f"{label:>8} {report['board']:>12} {args.strategy}: {report['games']} games, "
+                  f"{report['games_per_second']:.0f} games/s, win rate {report['win_rate']:.1%}, "
+                  f"{report['moves_per_game']:.1f} moves/game, ms/game generation {timing['generation']:.3f} "
+                  f"strategy {timing['strategy']:.3f} moves {timing['moves']:.3f}")
+
+if __name__ == "__main__":
+    main()
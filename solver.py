@@ -0,0 +1,193 @@
+"""Deterministic deductions for a logic.Grid: which unrevealed cells are provably safe or mines.
+
+Run directly to benchmark deductions per second on a large board:
+
+    python solver.py --size 1000 --density 0.16
+"""
+import argparse
+import random
+import time
+from logic import Grid, MINE, REVEALED
+
+class Solver:
+    """Keeps the frontier (revealed numbers next to unknown cells) up to date as
+    moves are observed, and applies single-point and subset/pair rules to it.
+
+    Only the numbers are trusted; player flags are ignored, so every cell in
+    safe and mines is certain.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.frontier = set()
+        # Deductions are kept both as board indices (for the rules) and as
+        # (row, col) positions (what solve() hands back).
+        self.safe = set()
+        self.mines = set()
+        self.safe_cells = set()
+        self.mine_cells = set()
+        self.deductions = 0
+        self._dirty = set()
+        cols = grid.cols
+        self._offsets = (-cols - 1, -cols, -cols + 1, -1, 1, cols - 1, cols, cols + 1)
+
+        for index, state in enumerate(grid.cells):
+            if state & REVEALED:
+                self._touch(index)
+
+    def _neighbors(self, index):
+        rows, cols = self.grid.rows, self.grid.cols
+        row, col = divmod(index, cols)
+        if 0 < row < rows - 1 and 0 < col < cols - 1:
+            return [index + offset for offset in self._offsets]
+        return [r * cols + c
+                for r in range(max(0, row - 1), min(rows, row + 2))
+                for c in range(max(0, col - 1), min(cols, col + 2))
+                if r * cols + c != index]
+
+    def _touch(self, index):
+        state = self.grid.cells[index]
+        if state & REVEALED and not state & MINE and self.grid.counts[index]:
+            self._dirty.add(index)
+
+    def observe(self, positions):
+        """Feed the cells a move changed, e.g. the keys of a ChangeSet's cells."""
+        cells, cols = self.grid.cells, self.grid.cols
+        for row, col in positions:
+            index = row * cols + col
+            if cells[index] & REVEALED:
+                if index in self.safe:
+                    self.safe.discard(index)
+                    self.safe_cells.discard((row, col))
+                self.frontier.discard(index)
+                self._touch(index)
+            for neighbor in self._neighbors(index):
+                if cells[neighbor] & REVEALED:
+                    self._touch(neighbor)
+
+    def _constraint(self, index):
+        """Unknown neighbors of a number and how many of them are mines."""
+        cells = self.grid.cells
+        unknown = []
+        remaining = self.grid.counts[index]
+        for neighbor in self._neighbors(index):
+            if cells[neighbor] & REVEALED or neighbor in self.safe:
+                continue
+            if neighbor in self.mines:
+                remaining -= 1
+            else:
+                unknown.append(neighbor)
+        return frozenset(unknown), remaining
+
+    def _mark(self, indices, target, positions):
+        progress = False
+        for index in indices:
+            if index not in target:
+                target.add(index)
+                positions.add(divmod(index, self.grid.cols))
+                self.deductions += 1
+                progress = True
+                for neighbor in self._neighbors(index):
+                    self._touch(neighbor)
+        return progress
+
+    def _pair_rules(self, index, unknown, remaining):
+        """Compare a constraint with every frontier number within two cells of it."""
+        rows, cols = self.grid.rows, self.grid.cols
+        row, col = divmod(index, cols)
+        for r in range(max(0, row - 2), min(rows, row + 3)):
+            for c in range(max(0, col - 2), min(cols, col + 3)):
+                other = r * cols + c
+                if other == index or other not in self.frontier:
+                    continue
+                other_unknown, other_remaining = self._constraint(other)
+                only_other = other_unknown - unknown
+                only_self = unknown - other_unknown
+                if not other_unknown or not (only_other or only_self):
+                    continue
+                # mines(only_other) - mines(only_self) == other_remaining - remaining
+                difference = other_remaining - remaining
+                if difference == len(only_other):
+                    mines, safe = only_other, only_self
+                elif -difference == len(only_self):
+                    mines, safe = only_self, only_other
+                else:
+                    continue
+                if self._mark(mines, self.mines, self.mine_cells) | self._mark(safe, self.safe, self.safe_cells):
+                    return True
+        return False
+
+    def solve(self):
+        """Run the rules to a fixed point; returns the live (safe, mines) sets of (row, col)."""
+        dirty = self._dirty
+        while dirty:
+            index = dirty.pop()
+            unknown, remaining = self._constraint(index)
+            if not unknown:
+                self.frontier.discard(index)
+                continue
+            self.frontier.add(index)
+
+            if remaining == 0:
+                self._mark(unknown, self.safe, self.safe_cells)
+            elif remaining == len(unknown):
+                self._mark(unknown, self.mines, self.mine_cells)
+            elif self._pair_rules(index, unknown, remaining):
+                dirty.add(index)
+
+        return self.safe_cells, self.mine_cells
+
+    def hint(self):
+        """One provably safe cell, or None if the board needs a guess."""
+        self.solve()
+        return min(self.safe_cells) if self.safe_cells else None
+
+def benchmark(size, density, reveal_fraction, seed):
+    rng = random.Random(seed)
+    grid = Grid(size, size, int(size * size * density), seed=seed)
+    grid.place_mines(size // 2, size // 2)
+    grid.reveal_cell(size // 2, size // 2)
+    for index, state in enumerate(grid.cells):
+        if not state & (MINE | REVEALED) and rng.random() < reveal_fraction:
+            grid.reveal_cell(*divmod(index, size))
+
+    started = time.perf_counter()
+    solver = Solver(grid)
+    safe, mines = solver.solve()
+    full = time.perf_counter() - started
+
+    # Incremental cost: reveal one deduced safe cell and solve again.
+    move = solver.hint()
+    started = time.perf_counter()
+    if move:
+        grid.reveal_cell(*move)
+        solver.observe(grid.last_revealed)
+        solver.solve()
+    incremental = time.perf_counter() - started
+
+    return {
+        "board": f"{size}x{size}",
+        "frontier": len(solver.frontier),
+        "safe": len(safe),
+        "mines": len(mines),
+        "deductions": solver.deductions,
+        "solve_seconds": full,
+        "deductions_per_second": solver.deductions / full if full else 0.0,
+        "incremental_ms": incremental * 1000,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the deduction solver.")
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--density", type=float, default=0.16)
+    parser.add_argument("--reveal", type=float, default=0.3, help="fraction of safe cells revealed up front")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.size, args.density, args.reveal, args.seed)
+    print(f"{result['board']}: {result['deductions']} deductions ({result['safe']} safe, {result['mines']} mines) "
+          f"over a frontier of {result['frontier']} in {result['solve_seconds']:.2f}s = "
+          f"{result['deductions_per_second']:.0f}/s; incremental move {result['incremental_ms']:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,28 @@
+import io
+import itertools
+import os
+import random
+import tempfile
+import threading
 import unittest
+import pygame
+import benchmark
+import board_pool
+from concurrent.futures import Future, ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 from scenes.game_scene import GameScene
-from FileManager import FileManager
+from FileManager import FileManager, pack_planes, unpack_planes
+import FileManager as file_manager_module
+import logic
+from journal import MoveJournal
+from logic import ChunkedGrid, GameLogic, Grid
+from probability import ProbabilityEngine
+from profiler import FrameProfiler
+from simulate import STRATEGIES, run_batch
+from solver import Solver
+from tracing import Tracer, DEBUG, INFO
+from utils import (AnimationScheduler, Camera, Cell, CellSkin, CELL_SKINS, SpriteRegistry, TextCache, TEXT_CACHE,
+                   EMOJI_FONT_PATH, STATUS_FONT_SIZE, cell_skin, load_gif_frames, load_cached_gif_frames)
 
 class MockGame:
     def __init__(self):
@@ -15,6 +36,7 @@ class TestSaveLoadGame(unittest.TestCase):
 
         with patch('pygame.display.set_mode') as mock_set_mode, \
              patch('pygame.font.SysFont') as mock_font, \
+             patch('pygame.font.Font') as mock_path_font, \
              patch('pygame.display.get_surface') as mock_get_surface, \
              patch('pygame.display.update') as mock_update, \
              patch('pygame.display.flip') as mock_flip:
@@ -22,6 +44,7 @@ class TestSaveLoadGame(unittest.TestCase):
             mock_set_mode.return_value = MagicMock()
 
             mock_font.return_value = MagicMock()
+            mock_path_font.return_value = MagicMock()
             
             mock_surface = MagicMock()
             mock_surface.get_size.return_value = (800, 600)
@@ -30,7 +53,19 @@ class TestSaveLoadGame(unittest.TestCase):
             mock_update.return_value = None
             mock_flip.return_value = None
             
-            self.game_scene = GameScene(self.mock_game, rows=9, cols=9, mines=10)
+            # Keep the autosave and the save out of the working directory, where
+            # Game.run would resume them.
+            self.directory = tempfile.TemporaryDirectory()
+            journal = MoveJournal(os.path.join(self.directory.name, "autosave"))
+            self.game_scene = GameScene(self.mock_game, rows=9, cols=9, mines=10, journal=journal)
+            self.game_scene.FileManager = FileManager(os.path.join(self.directory.name, "game_save.sav"),
+                                                      legacy_file_name=None)
+
+    def tearDown(self):
+        self.game_scene.FileManager.wait_for_save()
+        self.game_scene.journal.discard()
+        self.directory.cleanup()
+        TEXT_CACHE.evict(set())
 
     def test_save_and_load_game(self):
         self.game_scene.handle_left_click(0, 0)
@@ -56,5 +91,805 @@ class TestSaveLoadGame(unittest.TestCase):
 
         self.assertTrue(self.game_scene.grid[0][0].is_revealed, "Cell (0, 0) should be revealed after loading")
 
+    def test_resize_burst_relayouts_once_and_keeps_cells(self):
+        scene = self.game_scene
+        cells = scene.grid
+        burst = [pygame.event.Event(pygame.VIDEORESIZE, size=(700 + i, 500 + i)) for i in range(20)]
+        with patch.object(scene, 'relayout', wraps=scene.relayout) as relayout, \
+             patch('pygame.display.get_surface'), patch('pygame.display.set_mode'):
+            scene.handle_events(burst)
+            self.assertEqual(relayout.call_count, 0)
+            scene.update()
+            scene.update()
+        self.assertEqual(relayout.call_count, 1)
+        self.assertIs(scene.grid, cells)
+        self.assertEqual((scene.window_width, scene.window_height), (719, 519))
+        self.assertEqual(scene.camera.area.size, (719, 519 - 60))
+
+    def test_paused_scene_sleeps_until_input(self):
+        scene = self.game_scene
+        escape = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE)
+        hover = pygame.event.Event(pygame.MOUSEMOTION, pos=(0, 0), rel=(1, 1), buttons=(0, 0, 0))
+        with patch.object(scene, 'draw_pause_menu') as draw_pause_menu:
+            scene.handle_events([escape])
+            self.assertEqual(scene.idle_timeout(), 0)
+            self.assertIsNone(scene.draw(None))
+            self.assertIsNone(scene.idle_timeout())
+            self.assertEqual(scene.draw(None), [])
+            self.assertEqual(draw_pause_menu.call_count, 1)
+
+            scene.handle_events([hover])
+            self.assertEqual(scene.idle_timeout(), 0)
+            scene.draw(None)
+            self.assertEqual(draw_pause_menu.call_count, 2)
+
+        scene.handle_events([escape])
+        self.assertFalse(scene.is_paused)
+        self.assertTrue(scene.needs_full_redraw)
+
+class HeadlessSceneTest(unittest.TestCase):
+    """A GameScene on a real dummy-driver window, for tests that draw."""
+
+    def setUp(self):
+        pygame.init()
+        if not os.path.exists(EMOJI_FONT_PATH):
+            # The emoji font is not part of every checkout; use the default font for status text.
+            TEXT_CACHE.fonts[(EMOJI_FONT_PATH, STATUS_FONT_SIZE)] = pygame.font.SysFont(None, STATUS_FONT_SIZE)
+        self.directory = tempfile.TemporaryDirectory()
+        self.game = benchmark.HeadlessGame(pygame)
+        self.scene = GameScene(self.game, rows=9, cols=9, mines=10,
+                               journal=MoveJournal(os.path.join(self.directory.name, "autosave")))
+
+    def tearDown(self):
+        self.scene.journal.discard()
+        self.directory.cleanup()
+        TEXT_CACHE.evict(set())
+
+    def cell_screen_rect(self, row, col):
+        scene = self.scene
+        cell_rect = scene.camera.cell_rect(row, col).clip(scene.board_surface.get_rect())
+        return cell_rect.move(scene.board_rect().topleft)
+
+class TestDirtyRects(HeadlessSceneTest):
+    def test_first_draw_is_a_full_repaint_and_idle_frames_draw_nothing(self):
+        self.assertIsNone(self.scene.draw(self.game.screen))
+        self.assertEqual(self.scene.draw(self.game.screen), [])
+        self.assertEqual(self.scene.draw(self.game.screen), [])
+
+    def test_marked_cell_is_the_only_rect_drawn(self):
+        self.scene.draw(self.game.screen)
+        self.scene.mark_dirty(2, 3)
+        self.assertEqual(self.scene.draw(self.game.screen), [self.cell_screen_rect(2, 3)])
+
+    def test_right_click_redraws_just_that_cell(self):
+        self.scene.draw(self.game.screen)
+        self.scene.handle_right_click(4, 5)
+        self.assertTrue(self.scene.grid[4][5].is_flagged)
+        self.assertEqual(self.scene.draw(self.game.screen), [self.cell_screen_rect(4, 5)])
+
+class TestHeatmap(HeadlessSceneTest):
+    def test_only_frontier_cells_get_their_own_probability(self):
+        scene = self.scene
+        scene.handle_left_click(4, 4)
+        scene.toggle_heatmap()
+        probabilities = scene.heatmap.probabilities()
+        shaded = {(row, col) for row, col in probabilities if not scene.grid[row][col].is_revealed}
+        self.assertEqual(scene.heatmap_cells, shaded)
+        self.assertIsNotNone(scene.heatmap_interior)
+        for row in scene.grid:
+            for cell in row:
+                self.assertEqual(cell.mine_probability is not None, (cell.row, cell.col) in shaded)
+
+    def test_game_over_clears_the_heatmap(self):
+        scene = self.scene
+        scene.handle_left_click(4, 4)
+        scene.toggle_heatmap()
+        mine = scene.game_logic.grid.mine_positions()[0]
+        scene.handle_left_click(*mine)
+        self.assertTrue(scene.game_over)
+        self.assertIsNone(scene.heatmap)
+        self.assertIsNone(scene.heatmap_interior)
+        self.assertTrue(all(cell.mine_probability is None for row in scene.grid for cell in row))
+        scene.toggle_heatmap()
+        self.assertIsNone(scene.heatmap)
+
+class TestTextCache(HeadlessSceneTest):
+    def test_redraws_reuse_fonts_and_rendered_text(self):
+        scene = self.scene
+        scene.handle_left_click(4, 4)
+        scene.draw(self.game.screen)
+        TEXT_CACHE.fonts = {key: MagicMock(wraps=font) for key, font in TEXT_CACHE.fonts.items()}
+
+        with patch('pygame.font.SysFont') as sys_font, patch('pygame.font.Font') as font:
+            for _ in range(3):
+                scene.invalidate()
+                scene.draw(self.game.screen)
+        sys_font.assert_not_called()
+        font.assert_not_called()
+        for cached_font in TEXT_CACHE.fonts.values():
+            cached_font.render.assert_not_called()
+
+    def test_evict_drops_sizes_no_longer_used(self):
+        cache = TextCache()
+        for size in (20, 30):
+            cache.render("1", (0, 0, 0), size)
+        kept = cache.render("1", (0, 0, 0), 30)
+        cache.evict({30})
+        self.assertEqual(list(cache.fonts), [(None, 30)])
+        self.assertEqual(list(cache.surfaces), [("1", (0, 0, 0), 30, None)])
+        self.assertIs(cache.render("1", (0, 0, 0), 30), kept)
+
+class TestBinarySaveFormat(unittest.TestCase):
+    def make_game(self, rows, cols, mines, seed):
+        rng = random.Random(seed)
+        game_logic = GameLogic(rows, cols, mines, seed=seed)
+        game_logic.reveal_cell(rows // 2, cols // 2)
+        for _ in range(rows * cols // 50):
+            row, col = rng.randrange(rows), rng.randrange(cols)
+            if rng.random() < 0.5:
+                game_logic.toggle_mark(row, col)
+            elif not game_logic.grid.grid[row][col]['is_mine']:
+                game_logic.reveal_cell(row, col)
+        return game_logic
+
+    def test_round_trip_on_large_boards(self):
+        for compress in (True, False):
+            game_logic = self.make_game(1000, 1000, 150000, seed=21)
+            file_manager = FileManager(compress=compress)
+            data = file_manager.encode(game_logic, game_over=False, is_paused=True)
+            self.assertLess(len(data), 1000 * 1000 // 2 + 64)
+
+            loaded = file_manager.decode(data)
+            restored = loaded['logic']
+            self.assertEqual(restored.grid.cells, game_logic.grid.cells)
+            self.assertEqual(restored.grid.counts, game_logic.grid.counts)
+            self.assertEqual(restored.grid.unrevealed_safe, game_logic.grid.unrevealed_safe)
+            self.assertEqual(restored.board_code(), game_logic.board_code())
+            self.assertTrue(loaded['is_paused'])
+            self.assertFalse(loaded['game_over'])
+
+    def test_pure_python_packing_matches_numpy(self):
+        cells = bytearray(random.Random(5).randrange(16) for _ in range(1001))
+        packed = pack_planes(cells)
+        with patch.object(file_manager_module, "np", None):
+            self.assertEqual(pack_planes(cells), packed)
+            self.assertEqual(unpack_planes(packed, len(cells)), cells)
+        self.assertEqual(unpack_planes(packed, len(cells)), cells)
+
+    def test_background_save_is_atomic(self):
+        game_logic = self.make_game(50, 50, 300, seed=8)
+        with tempfile.TemporaryDirectory() as directory:
+            file_manager = FileManager(os.path.join(directory, "save.sav"))
+            pending = file_manager.save_game_async(game_logic, game_over=False, is_paused=False)
+            game_logic.toggle_mark(0, 0)
+            self.assertIsNone(pending.result(timeout=10))
+            self.assertEqual(os.listdir(directory), ["save.sav"])
+
+            loaded = file_manager.load_game()
+
+        self.assertEqual(len(loaded['logic'].grid.cells), 2500)
+        self.assertEqual(loaded['logic'].board_code(), game_logic.board_code())
+
+    def test_any_int_seed_can_be_saved(self):
+        file_manager = FileManager(legacy_file_name=None)
+        for seed in (-1, 2 ** 64):
+            unplaced = GameLogic(9, 9, 10, seed=seed)
+            self.assertEqual(file_manager.decode(file_manager.encode(unplaced, False, False))['logic'].grid.seed,
+                             unplaced.grid.seed)
+            placed = self.make_game(9, 9, 10, seed=seed)
+            loaded = file_manager.decode(file_manager.encode(placed, False, False))
+            self.assertEqual(loaded['logic'].board_code(), placed.board_code())
+
+    def test_imports_legacy_json_save(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_manager = FileManager(os.path.join(directory, "missing.sav"), "game_save.json")
+            loaded = file_manager.load_game()
+
+        self.assertEqual((loaded['rows'], loaded['cols'], loaded['mines']), (9, 9, 10))
+        grid = loaded['logic'].grid
+        self.assertTrue(grid.grid[0][0]['is_revealed'])
+        self.assertFalse(loaded['logic'].mines_placed)
+
+class TestMoveJournal(unittest.TestCase):
+    def play(self, game_logic, rng, moves):
+        for _ in range(moves):
+            row, col = rng.randrange(16), rng.randrange(16)
+            if rng.random() < 0.3:
+                game_logic.toggle_mark(row, col)
+            elif rng.random() < 0.2:
+                game_logic.chord(row, col)
+            elif not game_logic.grid.grid[row][col]['is_mine']:
+                game_logic.reveal_cell(row, col)
+
+    def test_restore_replays_moves_after_snapshot(self):
+        rng = random.Random(17)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "autosave")
+            game_logic = GameLogic(16, 16, 40)
+            journal = MoveJournal(path, snapshot_every=7)
+            journal.start(game_logic)
+            self.play(game_logic, rng, 40)
+            journal.close()
+            self.assertLess(os.path.getsize(path + ".journal"), 7 * 9)
+
+            restored_journal = MoveJournal(path, snapshot_every=7)
+            game_data = restored_journal.restore()
+            self.assertEqual(game_data['logic'].grid.cells, game_logic.grid.cells)
+
+            self.play(game_data['logic'], rng, 5)
+            restored_journal.close()
+            again = MoveJournal(path).restore()
+            self.assertEqual(again['logic'].grid.cells, game_data['logic'].grid.cells)
+
+    def test_snapshot_is_written_off_the_calling_thread(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = MoveJournal(os.path.join(directory, "autosave"))
+            writers = []
+            write_atomic = journal.file_manager.write_atomic
+            def recording_write(data):
+                writers.append(threading.current_thread())
+                write_atomic(data)
+            journal.file_manager.write_atomic = recording_write
+            journal.start(GameLogic(9, 9, 10))
+            journal.close()
+            self.assertEqual(len(writers), 1)
+            self.assertIsNot(writers[0], threading.current_thread())
+            self.assertTrue(journal.exists())
+
+    def test_only_moves_that_change_the_board_are_recorded(self):
+        game_logic = GameLogic(9, 9, 10, seed=4)
+        game_logic.journal = MagicMock()
+        game_logic.reveal_cell(4, 4)
+        game_logic.reveal_cell(4, 4)
+        game_logic.reveal_cell(9, 0)
+        game_logic.toggle_mark(4, 4)
+        game_logic.chord(0, 0)
+        self.assertEqual(game_logic.journal.record.call_args_list, [unittest.mock.call(game_logic, "reveal", 4, 4)])
+
+    def test_torn_record_is_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "autosave")
+            game_logic = GameLogic(16, 16, 40)
+            journal = MoveJournal(path)
+            journal.start(game_logic)
+            game_logic.reveal_cell(8, 8)
+            journal.close()
+            with open(path + ".journal", "ab") as f:
+                f.write(b"\x01\x02")
+
+            game_data = MoveJournal(path).restore()
+            self.assertEqual(game_data['logic'].grid.cells, game_logic.grid.cells)
+
+class TestSolver(unittest.TestCase):
+    def test_deductions_are_sound_and_match_a_fresh_solve(self):
+        rng = random.Random(30)
+        for seed in range(10):
+            grid = Grid(30, 16, 99, seed=seed)
+            grid.place_mines(15, 8)
+            grid.reveal_cell(15, 8)
+            solver = Solver(grid)
+
+            for _ in range(40):
+                safe, mines = solver.solve()
+                for row, col in safe:
+                    self.assertFalse(grid.grid[row][col]['is_mine'])
+                for row, col in mines:
+                    self.assertTrue(grid.grid[row][col]['is_mine'])
+                if not safe:
+                    break
+                grid.reveal_cell(*min(safe))
+                solver.observe(grid.last_revealed)
+
+            fresh = Solver(grid)
+            self.assertEqual(fresh.solve(), solver.solve())
+
+    def test_pair_rule_finds_one_two_pattern(self):
+        # Revealed row 1-2-1 over three unknown cells: the outer cells are mines.
+        grid = Grid(2, 3, 2)
+        grid.cells[0] |= logic.MINE
+        grid.cells[2] |= logic.MINE
+        grid._calculate_neighbors()
+        for col in range(3):
+            grid.reveal_cell(1, col)
+
+        safe, mines = Solver(grid).solve()
+        self.assertEqual(mines, {(0, 0), (0, 2)})
+        self.assertEqual(safe, {(0, 1)})
+
+class TestProbability(unittest.TestCase):
+    def brute_force(self, grid):
+        """Mine probability of every unrevealed cell by trying every layout."""
+        unknown = [i for i, state in enumerate(grid.cells) if not state & logic.REVEALED]
+        numbers = [divmod(i, grid.cols) for i, state in enumerate(grid.cells) if state & logic.REVEALED]
+        hits, layouts = dict.fromkeys(unknown, 0), 0
+        for layout in itertools.combinations(unknown, grid.mine_count):
+            mines = set(layout)
+            if all(sum(r * grid.cols + c in mines for r, c in grid.neighbors(row, col)) == grid.counts[row * grid.cols + col]
+                   for row, col in numbers):
+                layouts += 1
+                for index in layout:
+                    hits[index] += 1
+        return {divmod(index, grid.cols): count / layouts for index, count in hits.items()}
+
+    def test_matches_brute_force(self):
+        for seed in range(8):
+            rng = random.Random(seed)
+            grid = Grid(5, 5, rng.randint(3, 7), seed=seed)
+            grid.place_mines(2, 2)
+            grid.reveal_cell(2, 2)
+            engine = ProbabilityEngine(grid)
+            for _ in range(3):
+                probabilities = engine.probabilities()
+                for (row, col), expected in self.brute_force(grid).items():
+                    self.assertAlmostEqual(engine.probability(row, col, probabilities), expected)
+                safe = [i for i, state in enumerate(grid.cells) if not state & (logic.MINE | logic.REVEALED)]
+                if not safe:
+                    break
+                grid.reveal_cell(*divmod(rng.choice(safe), grid.cols))
+                engine.observe(grid.last_revealed)
+
+    def test_untouched_components_are_reused(self):
+        grid = Grid(60, 60, 500, seed=4)
+        grid.place_mines(30, 30)
+        grid.reveal_cell(30, 30)
+        for index in range(0, 3600, 7):
+            if not grid.cells[index] & logic.MINE:
+                grid.reveal_cell(*divmod(index, 60))
+        engine = ProbabilityEngine(grid)
+        engine.probabilities()
+        before = dict(engine.cache)
+
+        row, col = next(divmod(i, 60) for i, state in enumerate(grid.cells)
+                        if not state & (logic.MINE | logic.REVEALED) and i // 60 > 50)
+        grid.reveal_cell(row, col)
+        engine.observe(grid.last_revealed)
+        engine.probabilities()
+        reused = [component for component in engine.cache if before.get(component) is engine.cache[component]]
+        self.assertGreater(len(reused), len(engine.cache) // 2)
+
+class TestBenchmark(unittest.TestCase):
+    def test_logic_cases_time_every_hot_path(self):
+        cases = dict(benchmark.logic_cases(9, 9, 10, repeat=1))
+        self.assertEqual(set(cases), {"place_mines", "calculate_neighbors", "reveal_first_click",
+                                      "reveal_flood_worst", "check_win", "save_game", "load_game"})
+        self.assertTrue(all(timing["best_ms"] > 0 for timing in cases.values()))
+
+    def test_compare_flags_only_slowdowns_past_the_threshold(self):
+        timing = lambda ms: {"best_ms": ms, "median_ms": ms, "calls": 1}
+        baseline = {"results": {"a": timing(1.0), "b": timing(1.0), "gone": timing(1.0)}}
+        report = {"results": {"a": timing(1.2), "b": timing(1.5), "new": timing(9.0)}}
+        rows, regressions = benchmark.compare(report, baseline, threshold=0.25)
+        self.assertEqual([row[0] for row in rows], ["a", "b"])
+        self.assertEqual([row[0] for row in regressions], ["b"])
+
+class TestBoardPool(unittest.TestCase):
+    def test_generated_boards_clear_without_guessing(self):
+        code = board_pool.generate_board(16, 16, 40, seed=3)
+        self.assertEqual(code, board_pool.generate_board(16, 16, 40, seed=3))
+        game_logic = GameLogic.from_board_code(code)
+        self.assertEqual(game_logic.grid.first_click, (8, 8))
+        self.assertTrue(board_pool.solvable_without_guessing(game_logic, 8, 8))
+        self.assertTrue(game_logic.check_win())
+
+    def test_pool_tops_up_and_hands_out_boards_once(self):
+        with tempfile.TemporaryDirectory() as directory, ThreadPoolExecutor(max_workers=2) as executor:
+            pool = board_pool.BoardPool(9, 9, 10, size=3, directory=directory)
+            self.assertIsNone(pool.take())
+            self.assertEqual(len(pool.top_up(executor)), 3)
+            # Joining the workers also waits for the callbacks that add the boards.
+            executor.shutdown(wait=True)
+            self.assertEqual(len(pool), 3)
+            self.assertEqual(pool.top_up(executor), [])
+
+            taken = [pool.take() for _ in range(3)]
+            self.assertEqual(len(set(taken)), 3)
+            self.assertIsNone(pool.take())
+
+    def test_empty_pool_waits_without_blocking_the_caller(self):
+        with tempfile.TemporaryDirectory() as directory, ThreadPoolExecutor(max_workers=2) as executor:
+            pool = board_pool.BoardPool(9, 9, 10, size=0, directory=directory)
+            waiting = MagicMock(return_value=True)
+            with patch.dict(board_pool.POOLS, {(9, 9, 10): pool}), \
+                 patch.object(board_pool, "executor", return_value=executor):
+                code = board_pool.take_board(9, 9, 10, waiting=waiting)
+            self.assertEqual(GameLogic.from_board_code(code).grid.first_click, (4, 4))
+
+    def test_waiting_can_give_up_on_generation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pool = board_pool.BoardPool(9, 9, 10, size=0, directory=directory)
+            never_done = MagicMock()
+            never_done.submit.return_value = Future()
+            with patch.dict(board_pool.POOLS, {(9, 9, 10): pool}), \
+                 patch.object(board_pool, "executor", return_value=never_done):
+                self.assertIsNone(board_pool.take_board(9, 9, 10, waiting=lambda: False))
+            self.assertTrue(never_done.submit.return_value.cancelled())
+
+class TestSimulation(unittest.TestCase):
+    def test_batches_are_reproducible(self):
+        for name in STRATEGIES:
+            first = run_batch(9, 9, 10, name, base_seed=3, worker=1, games=20)
+            second = run_batch(9, 9, 10, name, base_seed=3, worker=1, games=20)
+            self.assertEqual((first["wins"], first["moves"]), (second["wins"], second["moves"]))
+            self.assertEqual(first["games"], 20)
+
+    def test_first_safe_click_keeps_every_candidate(self):
+        game_logic = GameLogic(9, 9, 10, seed=1)
+        strategy = STRATEGIES["first-safe-click"](random.Random(1))
+        self.assertEqual(strategy.start(game_logic), (4, 4))
+        self.assertEqual(sorted(strategy.candidates), list(range(81)))
+
+class TestGridStorage(unittest.TestCase):
+    def test_cell_view_reads_and_writes_packed_state(self):
+        grid = Grid(4, 5, 3)
+        grid.place_mines(0, 0)
+
+        for row in range(4):
+            for col in range(5):
+                index = row * 5 + col
+                self.assertEqual(grid.grid[row][col]['is_mine'], bool(grid.cells[index] & 1))
+                self.assertEqual(grid.grid[row][col]['neighbor_mines'], grid.counts[index])
+
+        grid.grid[3][4]['is_flagged'] = True
+        self.assertTrue(grid.grid[3][4]['is_flagged'])
+        grid.grid[3][4]['is_flagged'] = False
+        self.assertFalse(grid.grid[3][4].get('is_flagged'))
+        self.assertFalse(grid.grid[3][4]['is_questioned'])
+        self.assertEqual(grid.grid[3][4].get('is_exploded', 'missing'), 'missing')
+
+    def test_reveal_and_win_on_packed_grid(self):
+        grid = Grid(3, 3, 0)
+        grid.place_mines(1, 1)
+        self.assertEqual(grid.reveal_cell(1, 1), "safe")
+        self.assertTrue(all(cell['is_revealed'] for row in grid.grid for cell in row))
+        self.assertTrue(grid.check_win())
+
+    def test_flood_fill_handles_large_sparse_board(self):
+        grid = Grid(300, 300, 1)
+        grid.cells[299 * 300 + 299] |= logic.MINE
+        grid._calculate_neighbors()
+
+        self.assertEqual(grid.reveal_cell(0, 0), "safe")
+        self.assertEqual(len(grid.last_revealed), 300 * 300 - 1)
+        self.assertEqual(len(set(grid.last_revealed)), len(grid.last_revealed))
+        self.assertEqual(grid.last_revealed[0], (0, 0))
+        self.assertTrue(grid.check_win())
+
+class TestChunkedGrid(unittest.TestCase):
+    def test_matches_a_plain_grid_with_the_same_mines(self):
+        for seed in range(5):
+            chunked = ChunkedGrid(50, 47, 300, seed=seed, tile_size=16)
+            chunked.place_mines(25, 25)
+            chunked.reveal_cell(25, 25)
+
+            plain = Grid(50, 47, 300)
+            for index in range(50 * 47):
+                plain.cells[index] = chunked.cells[index] & logic.MINE
+            plain._calculate_neighbors()
+            plain.reset_counters()
+            plain.reveal_cell(25, 25)
+
+            self.assertEqual(sum(plain.cells[i] & logic.MINE for i in range(50 * 47)), 300)
+            self.assertEqual(set(chunked.last_revealed), set(plain.last_revealed))
+            self.assertEqual([chunked.counts[i] for i in range(50 * 47)], list(plain.counts))
+
+    def test_tiles_are_independent_of_visit_order(self):
+        first = ChunkedGrid(40, 40, 250, seed=9, tile_size=8)
+        second = ChunkedGrid(40, 40, 250, seed=9, tile_size=8)
+        first.place_mines(3, 3)
+        second.place_mines(3, 3)
+        forward = [first.cells[index] & logic.MINE for index in range(1600)]
+        backward = [second.cells[index] & logic.MINE for index in reversed(range(1600))]
+        self.assertEqual(forward, backward[::-1])
+        self.assertEqual(sum(forward), 250)
+
+    def test_huge_board_only_creates_touched_tiles(self):
+        game_logic = GameLogic(10000, 10000, 16000000, seed=1, tile_size=64)
+        changes = game_logic.reveal_cell(5000, 5000)
+        grid = game_logic.grid
+        self.assertEqual(changes.result, "safe")
+        self.assertLess(len(grid.tiles), 50)
+        self.assertLess(sum(grid.memory_usage().values()), 1 << 20)
+        self.assertEqual(grid.unrevealed_safe, 10000 * 10000 - 16000000 - len(changes))
+
+    def test_win_tracking_across_tiles(self):
+        game_logic = GameLogic(20, 30, 60, seed=2, tile_size=7)
+        game_logic.reveal_cell(10, 10)
+        grid = game_logic.grid
+        for index in range(20 * 30):
+            if not grid.cells[index] & (logic.MINE | logic.REVEALED):
+                self.assertFalse(game_logic.check_win())
+                game_logic.reveal_cell(*divmod(index, 30))
+        self.assertTrue(game_logic.check_win())
+        grid.verify_counters()
+
+@unittest.skipIf(logic.np is None, "numpy is not installed")
+class TestNeighborCounts(unittest.TestCase):
+    def test_numpy_and_python_paths_agree(self):
+        rng = random.Random(1234)
+        for _ in range(25):
+            rows, cols = rng.randint(1, 40), rng.randint(1, 40)
+            grid = Grid(rows, cols, 0)
+            for index in range(rows * cols):
+                if rng.random() < rng.random():
+                    grid.cells[index] |= logic.MINE
+
+            grid._calculate_neighbors_python()
+            expected = bytes(grid.counts)
+            grid.counts[:] = bytes(rows * cols)
+            grid._calculate_neighbors_numpy()
+            self.assertEqual(bytes(grid.counts), expected, f"mismatch on {rows}x{cols} board")
+
+class TestChangeSets(unittest.TestCase):
+    def test_reveal_reports_only_uncovered_cells(self):
+        game_logic = GameLogic(16, 16, 40, seed=11)
+        changes = game_logic.reveal_cell(8, 8)
+        self.assertEqual(changes.result, "safe")
+        self.assertEqual(set(changes.cells), set(game_logic.grid.last_revealed))
+        for (row, col), state in changes.cells.items():
+            self.assertTrue(state['is_revealed'])
+            self.assertEqual(state['neighbor_mines'], game_logic.grid.grid[row][col]['neighbor_mines'])
+
+    def test_toggle_mark_cycles_flag_question_clear(self):
+        game_logic = GameLogic(9, 9, 10, seed=2)
+        results = [game_logic.toggle_mark(0, 0).result for _ in range(3)]
+        self.assertEqual(results, ["flagged", "questioned", "cleared"])
+        self.assertEqual(game_logic.grid.flags_placed, 0)
+
+    def test_chord_reveals_unflagged_neighbors(self):
+        game_logic = GameLogic(9, 9, 10, seed=4)
+        game_logic.reveal_cell(4, 4)
+        grid = game_logic.grid
+        row, col = next((r, c) for r in range(9) for c in range(9)
+                        if grid.grid[r][c]['is_revealed'] and grid.grid[r][c]['neighbor_mines'])
+        for r, c in grid.neighbors(row, col):
+            if grid.grid[r][c]['is_mine']:
+                game_logic.toggle_mark(r, c)
+
+        changes = game_logic.chord(row, col)
+        self.assertEqual(changes.result, "safe")
+        for r, c in grid.neighbors(row, col):
+            self.assertTrue(grid.grid[r][c]['is_revealed'] or grid.grid[r][c]['is_mine'])
+
+class TestMinePlacement(unittest.TestCase):
+    def test_same_seed_gives_same_board(self):
+        first = Grid(16, 30, 99, seed=42)
+        second = Grid(16, 30, 99, seed=42)
+        first.place_mines(5, 5)
+        second.place_mines(5, 5)
+        self.assertEqual(first.cells, second.cells)
+        self.assertEqual(sum(state & logic.MINE for state in first.cells), 99)
+
+    def test_board_code_round_trip(self):
+        grid = Grid(16, 16, 40)
+        grid.place_mines(3, 7, rng=random.Random(7))
+        rebuilt = Grid.from_board_code(grid.board_code())
+        self.assertEqual(rebuilt.cells, grid.cells)
+        self.assertEqual(rebuilt.counts, grid.counts)
+        self.assertEqual(rebuilt.board_code(), grid.board_code())
+
+    def test_any_int_seed_gives_a_valid_board_code(self):
+        for seed in (-5, 2 ** 70):
+            grid = Grid(9, 9, 10, seed=seed)
+            grid.place_mines(4, 4, rng=seed)
+            self.assertRegex(grid.board_code(), r"^9x9x10-[0-9a-f]+-4,4$")
+            self.assertEqual(Grid.from_board_code(grid.board_code()).cells, grid.cells)
+
+    def test_safe_zone_is_respected_at_full_density(self):
+        grid = Grid(9, 9, 72, seed=3)
+        grid.place_mines(4, 4)
+        for row in range(3, 6):
+            for col in range(3, 6):
+                self.assertFalse(grid.grid[row][col]['is_mine'])
+        self.assertEqual(sum(state & logic.MINE for state in grid.cells), 72)
+
+    def test_too_many_mines_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Grid(9, 9, 73).place_mines(4, 4)
+
+class TestGridCounters(unittest.TestCase):
+    def setUp(self):
+        Grid.debug_counters = True
+
+    def tearDown(self):
+        Grid.debug_counters = False
+
+    def test_counters_track_reveals_and_flags(self):
+        rng = random.Random(99)
+        grid = Grid(16, 16, 40, seed=5)
+        grid.place_mines(8, 8)
+        self.assertEqual(grid.mines_remaining, 40)
+
+        while not grid.check_win():
+            row, col = rng.randrange(16), rng.randrange(16)
+            if grid.grid[row][col]['is_mine']:
+                grid.grid[row][col]['is_flagged'] = not grid.grid[row][col]['is_flagged']
+            else:
+                grid.reveal_cell(row, col)
+
+        grid.verify_counters()
+        self.assertEqual(grid.unrevealed_safe, 0)
+        self.assertEqual(grid.mines_remaining, 40 - grid.flags_placed)
+
+class TestCamera(unittest.TestCase):
+    def test_small_board_is_centred_and_mapped_through_margins(self):
+        camera = Camera(9, 30)
+        camera.fit(pygame.Rect(0, 60, 800, 540))
+        self.assertEqual(camera.cell_size, 26)
+        self.assertEqual(camera.viewport.topleft, (10, 213))
+        self.assertEqual(camera.screen_to_cell(10, 213), (0, 0))
+        self.assertEqual(camera.screen_to_cell(10 + 26 * 29 + 25, 213 + 26 * 8 + 25), (8, 29))
+        self.assertIsNone(camera.screen_to_cell(5, 300))
+        self.assertIsNone(camera.screen_to_cell(100, 100))
+
+    def test_large_board_scrolls_and_culls(self):
+        camera = Camera(1000, 1000)
+        camera.fit(pygame.Rect(0, 60, 800, 540))
+        rows, cols = camera.visible_cells()
+        self.assertEqual((len(rows), len(cols)), (34, 50))
+
+        camera.pan(16 * 100 + 8, 16 * 200)
+        rows, cols = camera.visible_cells()
+        self.assertEqual((rows.start, cols.start), (200, 100))
+        self.assertEqual((len(rows), len(cols)), (34, 51))
+        self.assertEqual(camera.screen_to_cell(0, 60), (200, 100))
+
+        self.assertTrue(camera.pan(-10 ** 6, 0))
+        self.assertEqual(camera.offset_x, 0)
+
+    def test_zoom_keeps_the_anchor_cell_in_place(self):
+        camera = Camera(1000, 1000)
+        camera.fit(pygame.Rect(0, 60, 800, 540))
+        camera.pan(5000, 5000)
+        anchor = (400, 300)
+        before = camera.screen_to_cell(*anchor)
+        self.assertTrue(camera.zoom(48, anchor))
+        self.assertEqual(camera.screen_to_cell(*anchor), before)
+        self.assertTrue(camera.zoom(1000))
+        self.assertEqual(camera.cell_size, 96)
+        self.assertFalse(camera.zoom(1000))
+
+class TestSprites(unittest.TestCase):
+    def test_cells_of_the_same_size_share_surfaces(self):
+        blitted = []
+        for row in range(2):
+            cell = Cell(row, 0, size=32)
+            cell.is_flagged = True
+            screen = MagicMock()
+            with patch('pygame.draw.rect'):
+                cell.draw(screen)
+            blitted.append(screen.blit.call_args[0][0])
+        self.assertIs(blitted[0], blitted[1])
+        self.assertIs(blitted[0], cell_skin(32).flag_image)
+
+    def test_cell_skin_is_built_once_per_size(self):
+        CELL_SKINS.pop(33, None)
+        with patch('utils.CellSkin', wraps=CellSkin) as skin_class:
+            first = cell_skin(33)
+            self.assertIs(cell_skin(33), first)
+        self.assertEqual(skin_class.call_count, 1)
+
+    def test_least_recently_used_scaled_sprites_are_evicted(self):
+        sprites = SpriteRegistry(max_scaled=2)
+        flag = sprites.get("flag", (10, 10))
+        sprites.get("mine", (10, 10))
+        sprites.get("flag", (10, 10))
+        sprites.get("question", (10, 10))
+        self.assertEqual(list(sprites.scaled), [("flag", (10, 10)), ("question", (10, 10))])
+        self.assertIs(sprites.get("flag", (10, 10)), flag)
+
+    def test_each_image_is_loaded_from_disk_once(self):
+        sprites = SpriteRegistry(max_scaled=1)
+        with patch('pygame.image.load', wraps=pygame.image.load) as load:
+            for size in ((10, 10), (20, 20), (10, 10)):
+                sprites.get("flag", size)
+            sprites.load("flag")
+        self.assertEqual(load.call_count, 1)
+
+class TestAnimationScheduler(unittest.TestCase):
+    def test_late_step_runs_once_and_stays_on_its_beat(self):
+        now = [0.0]
+        scheduler = AnimationScheduler(clock=lambda: now[0])
+        steps = []
+        scheduler.every(0.25, lambda: steps.append(now[0]))
+        self.assertFalse(scheduler.run_due())
+        self.assertEqual(scheduler.time_until_next(), 0.25)
+
+        now[0] = 10.1
+        self.assertTrue(scheduler.run_due())
+        self.assertEqual(steps, [10.1])
+        self.assertAlmostEqual(scheduler.time_until_next(), 0.15)
+
+    def test_nothing_scheduled_means_wait_indefinitely(self):
+        self.assertIsNone(AnimationScheduler().time_until_next())
+
+class TestFrameProfiler(unittest.TestCase):
+    def test_phases_and_counters_are_recorded_per_frame(self):
+        profiler = FrameProfiler()
+        profiler.start_frame()
+        profiler.count("cells", 5)
+        profiler.end_frame()
+        self.assertEqual(profiler.frames, [])
+
+        profiler.enable(show_hud=False)
+        for cells in (10, 20):
+            profiler.start_frame()
+            profiler.lap("update")
+            profiler.count("cells", cells)
+            profiler.lap("idle")
+            profiler.end_frame()
+        self.assertEqual([frame["cells"] for frame in profiler.frames], [10, 20])
+        frame = profiler.frames[-1]
+        self.assertEqual(frame["total"], sum(frame[phase] for phase in ("events", "update", "draw", "flip")))
+
+    def test_percentiles_use_the_rolling_window(self):
+        profiler = FrameProfiler(window=100)
+        profiler.enable(show_hud=False)
+        for milliseconds in range(1, 201):
+            profiler.current = {"events": 0.0, "update": 0.0, "draw": milliseconds / 1000, "flip": 0.0, "idle": 0.0}
+            profiler.end_frame()
+        p50, p95, p99 = profiler.percentiles()
+        self.assertAlmostEqual(p50, 150)
+        self.assertAlmostEqual(p95, 195)
+        self.assertAlmostEqual(p99, 199)
+
+class TestTracer(unittest.TestCase):
+    def test_disabled_category_records_nothing(self):
+        tracer = Tracer()
+        stream = io.StringIO()
+        tracer.configure({"io": INFO}, stream=stream, ring_size=10)
+        tracer.emit("reveal", DEBUG, "revealed", row=1, col=2)
+        tracer.emit("io", DEBUG, "too verbose")
+        self.assertFalse(tracer.wants("reveal", DEBUG))
+        self.assertEqual(stream.getvalue(), "")
+        self.assertEqual(len(tracer.buffer), 0)
+
+    def test_ring_buffer_keeps_latest_events(self):
+        tracer = Tracer()
+        tracer.configure_from_env({"MINESWEEPER_TRACE": "all=debug", "MINESWEEPER_TRACE_BUFFER": "3"})
+        tracer.stream = None
+        for index in range(5):
+            tracer.emit("generation", DEBUG, "event", index=index)
+
+        dump = io.StringIO()
+        tracer.dump(dump)
+        self.assertEqual([line.split()[-1] for line in dump.getvalue().splitlines()],
+                         ["index=2", "index=3", "index=4"])
+
+class TestEmojiFrameCache(unittest.TestCase):
+    def test_cached_frames_match_decoded_frames(self):
+        import pygame
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            decoded = load_gif_frames("assets/emoji/happy.gif")
+            first = load_cached_gif_frames("assets/emoji/happy.gif", cache_dir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            with patch("utils.load_gif_frames") as mock_decode:
+                second = load_cached_gif_frames("assets/emoji/happy.gif", cache_dir=cache_dir)
+                mock_decode.assert_not_called()
+
+        self.assertEqual(len(first), len(decoded))
+        self.assertEqual(len(second), len(decoded))
+        for expected, actual in zip(decoded, second):
+            self.assertEqual(pygame.image.tostring(expected, "RGBA"), pygame.image.tostring(actual, "RGBA"))
+
+    def test_concurrent_first_loads_share_one_decode(self):
+        from utils import EmojiFrames
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            def load(filename):
+                return load_cached_gif_frames(filename, cache_dir=cache_dir)
+
+            frames = EmojiFrames({"happy": "assets/emoji/happy.gif"})
+            results = []
+            with patch("utils.load_cached_gif_frames", side_effect=load) as mock_load:
+                threads = [threading.Thread(target=lambda: results.append(frames["happy"])) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            self.assertEqual(mock_load.call_count, 1)
+            self.assertTrue(all(result is results[0] for result in results))
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+CATEGORIES = ("generation", "reveal", "io", "render")
+
+class Tracer:
+    """Leveled trace events in named categories.
+
+    Call sites guard with wants() so nothing is formatted or stored for
+    categories that are switched off. Events that pass go to stream and,
+    when ring_size is set, into a ring buffer that dump() writes out.
+    """
+
+    def __init__(self):
+        self.thresholds = {}
+        self.stream = None
+        self.buffer = None
+        self.configure()
+
+    def configure(self, levels=None, stream=sys.stderr, ring_size=0, default=WARNING):
+        """levels maps category -> minimum level; unlisted categories use default."""
+        self.thresholds = {category: default for category in CATEGORIES}
+        self.thresholds.update(levels or {})
+        self.stream = stream
+        self.buffer = deque(maxlen=ring_size) if ring_size else None
+
+    def configure_from_env(self, environ=os.environ):
+        """Read MINESWEEPER_TRACE ("reveal,io=info" or "all=debug") and MINESWEEPER_TRACE_BUFFER."""
+        spec = environ.get("MINESWEEPER_TRACE", "")
+        levels = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            category, _, level_name = item.partition("=")
+            level = next((number for number, name in LEVEL_NAMES.items() if name == level_name), DEBUG)
+            for name in (CATEGORIES if category == "all" else (category,)):
+                levels[name] = level
+        ring_size = int(environ.get("MINESWEEPER_TRACE_BUFFER", "0") or 0)
+        self.configure(levels, ring_size=ring_size)
+
+    def wants(self, category, level):
+        return self.thresholds.get(category, OFF) <= level
+
+    def emit(self, category, level, message, **fields):
+        if not self.wants(category, level):
+            return
+        event = (time.perf_counter(), category, level, message, fields)
+        if self.buffer is not None:
+            self.buffer.append(event)
+        if self.stream is not None:
+            self.stream.write(self.format(event) + "\n")
+
+    @staticmethod
+    def format(event):
+        timestamp, category, level, message, fields = event
+        details = " ".join(f"{key}={value}" for key, value in fields.items())
+        return f"{timestamp:12.6f} {LEVEL_NAMES.get(level, level):7} {category:10} {message} {details}".rstrip()
+
+    def dump(self, stream=None):
+        """Write the buffered events, oldest first; used on crash or on demand."""
+        stream = stream or sys.stderr
+        for event in self.buffer or ():
+            stream.write(self.format(event) + "\n")
+
+TRACE = Tracer()
+TRACE.configure_from_env()
@@ -1,5 +1,10 @@
+import hashlib
+import os
+import threading
+import time
 import pygame
-from PIL import Image
+from collections import OrderedDict
+from profiler import PROFILER
 
 # Constants
 ROWS, COLS = 10, 10
@@ -7,32 +12,125 @@ CELL_SIZE = 40
 BANNER_HEIGHT = 60
 WIDTH, HEIGHT = COLS * CELL_SIZE, ROWS * CELL_SIZE + BANNER_HEIGHT
 FPS = 60
+# The emoji used to step every 4 frames at 60 FPS; now it steps on the clock.
+EMOJI_FRAME_SECONDS = 4 / 60
 
 GRAY = (200, 200, 200)
 DARK_GRAY = (100, 100, 100)
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 
-def load_gif_frames(filename):
+EMOJI_FONT_PATH = "assets/fonts/seguiemj.ttf"
+STATUS_FONT_SIZE = 24
+STATUS_TEXT_COLOR = (30, 30, 30)
+
+NUMBER_COLORS = {
+    1: (0, 0, 255),
+    2: (0, 128, 0),
+    3: (255, 0, 0),
+    4: (128, 0, 128),
+    5: (128, 0, 0),
+    6: (0, 128, 128),
+    7: (0, 0, 0),
+    8: (128, 128, 128)
+}
+
+# Probability heatmap: unrevealed cells blend from DARK_GRAY towards this.
+HEATMAP_COLOR = (220, 40, 40)
+HEATMAP_LEVELS = 20
+
+def heatmap_color(probability):
+    return tuple(round(base + (hot - base) * probability) for base, hot in zip(DARK_GRAY, HEATMAP_COLOR))
+
+def number_font_size(cell_size):
+    return max(10, min(24, cell_size * 3 // 5))
+
+EMOJI_SIZE = (48, 48)
+FRAME_CACHE_DIR = ".cache/emoji"
+
+def load_gif_frames(filename, size=EMOJI_SIZE):
+    from PIL import Image
+
     pil_gif = Image.open(filename)
     frames = []
     try:
         while True:
             frame = pil_gif.convert("RGBA")
             pygame_image = pygame.image.fromstring(frame.tobytes(), frame.size, frame.mode)
-            pygame_image = pygame.transform.scale(pygame_image, (48, 48))
+            pygame_image = pygame.transform.scale(pygame_image, size)
             frames.append(pygame_image)
             pil_gif.seek(pil_gif.tell() + 1)
     except EOFError:
         pass
     return frames
 
-EMOJI_FRAMES = {
-            "neutral": load_gif_frames("assets/emoji/neutral.gif"),
-            "happy": load_gif_frames("assets/emoji/happy.gif"),
-            "win": load_gif_frames("assets/emoji/win.gif"),
-            "shocked": load_gif_frames("assets/emoji/shocked.gif"),
-        }
+def load_cached_gif_frames(filename, size=EMOJI_SIZE, cache_dir=FRAME_CACHE_DIR):
+    """Like load_gif_frames, but reuses scaled frames stored as a raw RGBA strip on disk.
+
+    The cache file is keyed by a hash of the GIF and the target size, so an
+    edited GIF or a new size is decoded again.
+    """
+    with open(filename, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f"{digest}_{size[0]}x{size[1]}.rgba")
+    frame_bytes = size[0] * size[1] * 4
+
+    try:
+        with open(cache_path, "rb") as f:
+            strip = f.read()
+    except OSError:
+        strip = b""
+    if strip and len(strip) % frame_bytes == 0:
+        return [pygame.image.fromstring(strip[offset:offset + frame_bytes], size, "RGBA")
+                for offset in range(0, len(strip), frame_bytes)]
+
+    frames = load_gif_frames(filename, size)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Two threads may decode the same GIF; each writes its own temp file.
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            for frame in frames:
+                f.write(pygame.image.tostring(frame, "RGBA"))
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+    return frames
+
+class EmojiFrames:
+    """Emoji animations keyed by status, decoded the first time each one is used.
+
+    The loader thread warms these while the game may already be asking for
+    them, so a lock makes sure each animation is decoded only once.
+    """
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.loaded = {}
+        self.lock = threading.Lock()
+
+    def __getitem__(self, key):
+        frames = self.loaded.get(key)
+        if frames is None:
+            with self.lock:
+                frames = self.loaded.get(key)
+                if frames is None:
+                    frames = load_cached_gif_frames(self.paths[key])
+                    self.loaded[key] = frames
+        return frames
+
+    def __contains__(self, key):
+        return key in self.paths
+
+    def keys(self):
+        return self.paths.keys()
+
+EMOJI_FRAMES = EmojiFrames({
+    "neutral": "assets/emoji/neutral.gif",
+    "happy": "assets/emoji/happy.gif",
+    "win": "assets/emoji/win.gif",
+    "shocked": "assets/emoji/shocked.gif",
+})
 
 STATUS_MESSAGES = {
             "neutral": ["Welcome to Minesweeper!"],
@@ -41,19 +139,258 @@ STATUS_MESSAGES = {
             "win": ["Congratulations! You've cleared the minefield!", "You win! 🎉", "Victory! Minefield cleared!"]
         }
 
-class Cell:
+class TextCache:
+    """Rendered text surfaces shared by every scene, keyed by (text, color, size)."""
+
+    def __init__(self):
+        self.fonts = {}
+        self.surfaces = {}
+
+    def get_font(self, size, path=None):
+        font = self.fonts.get((path, size))
+        if font is None:
+            font = pygame.font.Font(path, size) if path else pygame.font.SysFont(None, size)
+            self.fonts[(path, size)] = font
+        return font
+
+    def render(self, text, color, size, path=None):
+        key = (text, color, size, path)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.get_font(size, path).render(text, True, color)
+            self.surfaces[key] = surface
+            PROFILER.count("text_renders")
+        return surface
+
+    def prepare_numbers(self, cell_size):
+        size = number_font_size(cell_size)
+        for number, color in NUMBER_COLORS.items():
+            self.render(str(number), color, size)
+
+    def prepare_status_messages(self):
+        for messages in STATUS_MESSAGES.values():
+            for message in messages:
+                self.render(message, STATUS_TEXT_COLOR, STATUS_FONT_SIZE, EMOJI_FONT_PATH)
+
+    def evict(self, keep_sizes):
+        """Drop fonts and surfaces for sizes no longer on screen, e.g. after a resize."""
+        self.surfaces = {key: surface for key, surface in self.surfaces.items() if key[2] in keep_sizes}
+        self.fonts = {key: font for key, font in self.fonts.items() if key[1] in keep_sizes}
+
+TEXT_CACHE = TextCache()
+
+class SpriteRegistry:
+    """Icons from assets/icons, loaded once and shared by every Cell.
+
+    Scaled copies are kept per (name, size) and the least recently used
+    ones are dropped once more than max_scaled exist.
+    """
+
+    def __init__(self, max_scaled=64):
+        self.max_scaled = max_scaled
+        self.originals = {}
+        self.scaled = OrderedDict()
+        # Held while loading, which the loader thread's preload() also does.
+        self.lock = threading.Lock()
+
     @staticmethod
-    def load_and_scale_image(path, size):
-        image = pygame.image.load(path)
-        return pygame.transform.scale(image, size)
+    def _convert(image):
+        try:
+            return image.convert_alpha()
+        except pygame.error:
+            # No video mode yet; blit the unconverted surface instead.
+            return image
+
+    def load(self, name):
+        image = self.originals.get(name)
+        if image is None:
+            with self.lock:
+                image = self.originals.get(name)
+                if image is None:
+                    image = self._convert(pygame.image.load(f"assets/icons/{name}.png"))
+                    self.originals[name] = image
+        return image
+
+    def preload(self):
+        for file_name in sorted(os.listdir("assets/icons")):
+            name, extension = os.path.splitext(file_name)
+            if extension == ".png":
+                self.load(name)
+
+    def get(self, name, size):
+        key = (name, size)
+        image = self.scaled.get(key)
+        if image is not None:
+            self.scaled.move_to_end(key)
+            return image
+
+        image = self._convert(pygame.transform.scale(self.load(name), size))
+        self.scaled[key] = image
+        if len(self.scaled) > self.max_scaled:
+            self.scaled.popitem(last=False)
+        return image
+
+SPRITES = SpriteRegistry()
+
+class AnimationScheduler:
+    """Periodic animation steps driven by a monotonic clock instead of the frame count.
+
+    The main loop asks time_until_next() how long it may sleep, then calls
+    run_due() to step whatever has come due.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.tasks = []
+
+    def every(self, interval, step):
+        self.tasks.append([self.clock() + interval, interval, step])
+
+    def run_due(self):
+        """Call each step whose time has come. A step that is late, e.g. after
+        the game was paused, runs once rather than once per missed interval."""
+        now = self.clock()
+        ran = False
+        for task in self.tasks:
+            due, interval, step = task
+            if now >= due:
+                step()
+                task[0] = due + (int((now - due) // interval) + 1) * interval
+                ran = True
+        return ran
+
+    def time_until_next(self):
+        """Seconds until the next step is due, or None with nothing scheduled."""
+        if not self.tasks:
+            return None
+        return max(0.0, min(task[0] for task in self.tasks) - self.clock())
+
+# Zoom range of the game board, in pixels per cell.
+MIN_CELL_SIZE = 16
+MAX_CELL_SIZE = 96
+
+class Camera:
+    """Maps board cells to screen pixels for GameScene: zoom is cell_size and
+    (offset_x, offset_y) is the board pixel shown at the viewport's top-left.
+
+    The viewport is the part of the board area the board covers; a board
+    smaller than the area is centred in it and cannot scroll.
+    """
+
+    def __init__(self, rows, cols, cell_size=CELL_SIZE):
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.offset_x = 0
+        self.offset_y = 0
+        self.area = pygame.Rect(0, 0, 0, 0)
+        self.viewport = pygame.Rect(0, 0, 0, 0)
+
+    def fit(self, area):
+        """Zoom so the whole board fits area, unless that would make cells unreadable."""
+        self.cell_size = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, area.width // self.cols, area.height // self.rows))
+        self.set_area(area)
 
-    def __init__ (self, row, col, size):
+    def set_area(self, area):
+        self.area = pygame.Rect(area)
+        width = min(self.cols * self.cell_size, self.area.width)
+        height = min(self.rows * self.cell_size, self.area.height)
+        self.viewport = pygame.Rect(self.area.x + (self.area.width - width) // 2,
+                                    self.area.y + (self.area.height - height) // 2, width, height)
+        self._clamp()
+
+    def _clamp(self):
+        self.offset_x = max(0, min(self.offset_x, self.cols * self.cell_size - self.viewport.width))
+        self.offset_y = max(0, min(self.offset_y, self.rows * self.cell_size - self.viewport.height))
+
+    def pan(self, dx, dy):
+        """Scroll by (dx, dy) screen pixels; returns True if the view moved."""
+        before = (self.offset_x, self.offset_y)
+        self.offset_x += dx
+        self.offset_y += dy
+        self._clamp()
+        return (self.offset_x, self.offset_y) != before
+
+    def zoom(self, cell_size, anchor=None):
+        """Change the zoom, keeping the board point under anchor (a screen
+        position, default the viewport centre) in place. Returns True if it changed."""
+        cell_size = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, cell_size))
+        if cell_size == self.cell_size:
+            return False
+        anchor_x, anchor_y = anchor or self.viewport.center
+        board_x = (self.offset_x + anchor_x - self.viewport.x) * cell_size / self.cell_size
+        board_y = (self.offset_y + anchor_y - self.viewport.y) * cell_size / self.cell_size
+        self.cell_size = cell_size
+        self.set_area(self.area)
+        self.offset_x = round(board_x) - (anchor_x - self.viewport.x)
+        self.offset_y = round(board_y) - (anchor_y - self.viewport.y)
+        self._clamp()
+        return True
+
+    def screen_to_cell(self, x, y):
+        """The (row, col) under a screen position, or None outside the board."""
+        if not self.viewport.collidepoint(x, y):
+            return None
+        col = (x - self.viewport.x + self.offset_x) // self.cell_size
+        row = (y - self.viewport.y + self.offset_y) // self.cell_size
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def visible_cells(self):
+        """Row and column ranges of the cells at least partly inside the viewport."""
+        size = self.cell_size
+        rows = range(self.offset_y // size, min(self.rows, -(-(self.offset_y + self.viewport.height) // size)))
+        cols = range(self.offset_x // size, min(self.cols, -(-(self.offset_x + self.viewport.width) // size)))
+        return rows, cols
+
+    def is_visible(self, row, col):
+        rows, cols = self.visible_cells()
+        return row in rows and col in cols
+
+    def cell_rect(self, row, col):
+        """Where a cell is drawn, relative to the viewport's top-left."""
+        return pygame.Rect(col * self.cell_size - self.offset_x, row * self.cell_size - self.offset_y,
+                           self.cell_size, self.cell_size)
+
+class CellSkin:
+    """What drawing a cell needs that depends only on its size: the icons and
+    the number font size. One skin is shared by every cell on the board, so a
+    zoom or window resize swaps the skin instead of rebuilding the cells."""
+
+    def __init__(self, size):
+        self.size = size
+        self.number_size = number_font_size(size)
+        # Icon sizes match the original 40px layout (30/24/16) and scale with the cell.
+        marker_size = (max(1, size - 10),) * 2
+        mine_size = (max(1, size * 3 // 5),) * 2
+        badge_size = (max(1, size * 2 // 5),) * 2
+        self.flag_image = SPRITES.get("flag", marker_size)
+        self.question_image = SPRITES.get("question", marker_size)
+        self.mine_image = SPRITES.get("mine", mine_size)
+        self.mine_exploded_image = SPRITES.get("mine_exploded", mine_size)
+        self.correct_flag_image = SPRITES.get("correct_flag", badge_size)
+        self.wrong_flag_image = SPRITES.get("wrong_flag", badge_size)
+
+CELL_SKINS = {}
+
+def cell_skin(size):
+    skin = CELL_SKINS.get(size)
+    if skin is None:
+        if len(CELL_SKINS) >= 8:
+            CELL_SKINS.clear()
+        skin = CELL_SKINS[size] = CellSkin(size)
+    return skin
+
+class Cell:
+    def __init__ (self, row, col, size=CELL_SIZE):
         self.row = row
         self.col = col
         self.size = size
+        # Position on the board surface; GameScene offsets it to screen space.
         self.rect = pygame.Rect(
             col * size,
-            row * size + BANNER_HEIGHT,
+            row * size,
             size,
             size
         )
@@ -62,13 +399,9 @@ class Cell:
         self.is_flagged = False
         self.is_questioned = False
         self.was_triggered = False
-
-        self.flag_image = self.load_and_scale_image("assets/icons/flag.png", (CELL_SIZE - 10, CELL_SIZE - 10))
-        self.question_image = self.load_and_scale_image("assets/icons/question.png", (CELL_SIZE - 10, CELL_SIZE - 10))
-        self.mine_image = self.load_and_scale_image("assets/icons/mine.png", (24, 24))
-        self.mine_exploded_image = self.load_and_scale_image("assets/icons/mine_exploded.png", (24, 24))
-        self.correct_flag_image = self.load_and_scale_image("assets/icons/correct_flag.png", (16, 16))
-        self.wrong_flag_image = self.load_and_scale_image("assets/icons/wrong_flag.png", (16, 16))
+        self.game_over = False
+        # Set while the probability heatmap is shown.
+        self.mine_probability = None
 
     def to_dict(self):
         return {
@@ -80,62 +413,62 @@ class Cell:
             'neighbor_mines': self.neighbor_mines,
         }
 
-    def draw(self, screen, rect=None):
+    def draw(self, screen, rect=None, skin=None, interior_probability=None):
+        """interior_probability shades an unrevealed cell without a mine_probability of its own."""
         cell_rect = rect if rect else self.rect
-        color = GRAY if self.is_revealed else DARK_GRAY
+        skin = skin or cell_skin(cell_rect.width)
+        probability = self.mine_probability if self.mine_probability is not None else interior_probability
+        if self.is_revealed:
+            color = GRAY
+        elif probability is not None and not self.game_over:
+            color = heatmap_color(probability)
+        else:
+            color = DARK_GRAY
         pygame.draw.rect(screen, color, cell_rect)
         pygame.draw.rect(screen, BLACK, cell_rect, 1)
 
         if self.was_triggered:
-                exploded_rect = self.mine_exploded_image.get_rect(center=cell_rect.center)
-                screen.blit(self.mine_exploded_image, exploded_rect)
+                exploded_rect = skin.mine_exploded_image.get_rect(center=cell_rect.center)
+                screen.blit(skin.mine_exploded_image, exploded_rect)
                 return
 
         if not self.is_revealed:
             if self.is_flagged:
-                flag_rect = self.flag_image.get_rect(center=self.rect.center)
-                screen.blit(self.flag_image, flag_rect)
+                flag_rect = skin.flag_image.get_rect(center=cell_rect.center)
+                screen.blit(skin.flag_image, flag_rect)
             elif self.is_questioned:
-                question_rect = self.question_image.get_rect(center=self.rect.center)
-                screen.blit(self.question_image, question_rect)
+                question_rect = skin.question_image.get_rect(center=cell_rect.center)
+                screen.blit(skin.question_image, question_rect)
             
             if hasattr(self, 'game_over') and self.game_over:
                 logic_cell = self.logic_cell_ref
 
                 if self.was_triggered:
-                    exploded_rect = self.mine_exploded_image.get_rect(center=cell_rect.center)
-                    screen.blit(self.mine_exploded_image, exploded_rect)
+                    exploded_rect = skin.mine_exploded_image.get_rect(center=cell_rect.center)
+                    screen.blit(skin.mine_exploded_image, exploded_rect)
 
                 if logic_cell['is_mine'] and not self.is_flagged:
-                    mine_rect = self.mine_image.get_rect(center=cell_rect.center)
-                    screen.blit(self.mine_image, mine_rect)
+                    mine_rect = skin.mine_image.get_rect(center=cell_rect.center)
+                    screen.blit(skin.mine_image, mine_rect)
 
                 elif self.is_flagged:
                     if logic_cell['is_mine']:
-                        tick_rect = (self.correct_flag_image.get_rect(bottomright=cell_rect.bottomright))
-                        screen.blit(self.correct_flag_image, tick_rect)
+                        tick_rect = (skin.correct_flag_image.get_rect(bottomright=cell_rect.bottomright))
+                        screen.blit(skin.correct_flag_image, tick_rect)
                     else:
-                        cross_rect = self.wrong_flag_image.get_rect(bottomright=cell_rect.bottomright)
-                        screen.blit(self.wrong_flag_image, cross_rect)
+                        cross_rect = skin.wrong_flag_image.get_rect(bottomright=cell_rect.bottomright)
+                        screen.blit(skin.wrong_flag_image, cross_rect)
 
         if self.is_revealed and self.neighbor_mines > 0:
-            number_colors = {
-                1: (0, 0, 255),
-                2: (0, 128, 0),
-                3: (255, 0, 0),
-                4: (128, 0, 128),
-                5: (128, 0, 0),   
-                6: (0, 128, 128),
-                7: (0, 0, 0), 
-                8: (128, 128, 128) 
-            }
-            text_color = number_colors.get(self.neighbor_mines, BLACK)
-
-            font = pygame.font.SysFont(None, 24)
-            text = font.render(str(self.neighbor_mines), True, text_color)
+            text_color = NUMBER_COLORS.get(self.neighbor_mines, BLACK)
+            text = TEXT_CACHE.render(str(self.neighbor_mines), text_color, skin.number_size)
             text_rect = text.get_rect(center=cell_rect.center)
             screen.blit(text, text_rect)
 
+    def visual_state(self):
+        return (self.is_revealed, self.neighbor_mines, self.is_flagged,
+                self.is_questioned, self.was_triggered, self.game_over, self.mine_probability)
+
     def sync_with_logic(self, logic):
         logic_data = logic.grid[self.row][self.col]
         self.is_revealed = logic_data.get('is_revealed', self.is_revealed)